@@ -0,0 +1,26 @@
+import numpy as np
+
+from rps import Move
+
+
+# OUTCOME_MATRIX[first, second] is Move.OUTCOMES as a COUNT x COUNT array.
+OUTCOME_MATRIX = np.array(Move.OUTCOMES, dtype=np.int8).reshape(
+    Move.COUNT, Move.COUNT)
+
+
+def encode(moves):
+    return np.fromiter((move.code for move in moves), dtype=np.int8,
+                       count=len(moves))
+
+def resolve_rounds(first_codes, second_codes):
+    # One gather for any number of rounds: 1 where the first move wins, -1
+    # where the second wins and 0 for ties.
+    first_codes = np.asarray(first_codes, dtype=np.intp)
+    second_codes = np.asarray(second_codes, dtype=np.intp)
+    return OUTCOME_MATRIX[first_codes, second_codes]
+
+def tally(first_codes, second_codes):
+    # (first wins, ties, second wins) across all rounds.
+    outcomes = resolve_rounds(first_codes, second_codes)
+    counts = np.bincount(outcomes + 1, minlength=3)
+    return int(counts[2]), int(counts[1]), int(counts[0])
@@ -0,0 +1,68 @@
+import argparse
+import random
+import time
+
+from rps import Iocaine
+from tournament import PLAYERS
+
+
+class HistoryBenchmark:
+    # Plays Iocaine against a scripted opponent and times the rounds just
+    # before each checkpoint, so latency at a 1k-round history can be set
+    # against latency at a million.
+    CHECKPOINTS = (1_000, 10_000, 100_000, 1_000_000)
+    WINDOW = 1_000
+
+    def __init__(self, opponent='random', seed=0):
+        random.seed(seed)
+        self.bot = Iocaine()
+        self.opponent = PLAYERS[opponent](random.Random(seed))
+        self.rounds = 0
+
+    def play(self, rounds):
+        bot, opponent = self.bot, self.opponent
+        for _ in range(rounds):
+            opponent.choose(bot)
+            bot.choose(opponent)
+        self.rounds += rounds
+
+    def run(self, checkpoints=CHECKPOINTS):
+        # Microseconds per round for the WINDOW rounds ending at each
+        # checkpoint.
+        results = {}
+        for checkpoint in checkpoints:
+            window = min(HistoryBenchmark.WINDOW, checkpoint - self.rounds)
+            self.play(checkpoint - self.rounds - window)
+            start = time.perf_counter()
+            self.play(window)
+            results[checkpoint] = ((time.perf_counter() - start) * 1e6
+                                   / window)
+
+        return results
+
+def report(results):
+    first = next(iter(results.values()))
+    lines = [f"{'history':>12}  {'us/round':>10}  {'vs first':>8}"]
+    for rounds, micros in results.items():
+        lines.append(f"{rounds:>12,}  {micros:>10.2f}  "
+                     f"{micros / first:>7.2f}x")
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time Iocaine's rounds as the move history grows.")
+    parser.add_argument('--opponent', choices=list(PLAYERS),
+                        default='random')
+    parser.add_argument('--rounds', type=int,
+                        default=HistoryBenchmark.CHECKPOINTS[-1],
+                        help='longest history to time')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    checkpoints = [checkpoint for checkpoint in HistoryBenchmark.CHECKPOINTS
+                   if checkpoint < args.rounds] + [args.rounds]
+    benchmark = HistoryBenchmark(args.opponent, args.seed)
+    print(f"Iocaine against {args.opponent}:")
+    print(report(benchmark.run(checkpoints)))
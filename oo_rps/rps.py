@@ -1,3 +1,5 @@
+import array
+import collections
 import os
 import random
 import sys
@@ -56,46 +58,192 @@ class Rules:
         ScreenControl.press_enter_to_continue_clear()
 
 class Move:
-    def __init__(self):
-        self.strengths = {}
+    # Moves are interned: each subclass has exactly one instance, so moves
+    # compare by identity and carry a small integer CODE. Round results and
+    # verbs come from flat COUNT x COUNT tables built below the subclasses.
+    __slots__ = ()
+    CODE = None
+    INSTANCES = {}
+
+    def __new__(cls):
+        instance = Move.INSTANCES.get(cls)
+        if instance is None:
+            instance = super().__new__(cls)
+            Move.INSTANCES[cls] = instance
+        return instance
+
+    @property
+    def code(self):
+        return self.CODE
+
+    def outcome_against(self, other):
+        return Move.OUTCOMES[self.CODE * Move.COUNT + other.CODE]
+
+    def verb_against(self, other):
+        return Move.VERBS[self.CODE * Move.COUNT + other.CODE]
 
     def __str__(self):
         return f'{self.__class__.__name__}'
 
 class Rock(Move):
-    def __init__(self):
-        super().__init__()
-        self.strengths = {Scissors: 'crushes', Lizard: 'crushes'}
+    __slots__ = ()
+    CODE = 0
 
 class Paper(Move):
-    def __init__(self):
-        super().__init__()
-        self.strengths = {Rock: 'covers', Spock: 'disproves'}
+    __slots__ = ()
+    CODE = 1
 
 class Scissors(Move):
-    def __init__(self):
-        super().__init__()
-        self.strengths = {Paper: 'cut', Lizard: 'decapitate'}
+    __slots__ = ()
+    CODE = 2
 
 class Lizard(Move):
-    def __init__(self):
-        super().__init__()
-        self.strengths = {Paper: 'eats', Spock: 'poisons'}
+    __slots__ = ()
+    CODE = 3
 
 class Spock(Move):
-    def __init__(self):
-        super().__init__()
-        self.strengths = {Rock: 'vaporizes', Scissors: 'smashes'}
+    __slots__ = ()
+    CODE = 4
+
+Rock.strengths = {Scissors: 'crushes', Lizard: 'crushes'}
+Paper.strengths = {Rock: 'covers', Spock: 'disproves'}
+Scissors.strengths = {Paper: 'cut', Lizard: 'decapitate'}
+Lizard.strengths = {Paper: 'eats', Spock: 'poisons'}
+Spock.strengths = {Rock: 'vaporizes', Scissors: 'smashes'}
+
+Move.ALL = (Rock(), Paper(), Scissors(), Lizard(), Spock())
+Move.COUNT = len(Move.ALL)
+# OUTCOMES[first * COUNT + second] is 1 if `first` wins, -1 if `second`
+# wins and 0 for a tie. VERBS holds the winner's verb at the same index.
+Move.VERBS = tuple(first.strengths.get(second.__class__)
+                   for first in Move.ALL for second in Move.ALL)
+Move.OUTCOMES = tuple(
+    1 if second.__class__ in first.strengths
+    else -1 if first.__class__ in second.strengths
+    else 0
+    for first in Move.ALL for second in Move.ALL)
+# COUNTERS[code] is the first move, in CHOICES order, that beats `code`.
+Move.COUNTERS = tuple(
+    next(choice for choice in Move.ALL if move.__class__ in choice.strengths)
+    for move in Move.ALL)
+
+class MoveFrequency:
+    # Per-move counts, updated as each move is played, so the most frequent
+    # move costs one pass over the five codes however long the match runs.
+    # With `window`, only the last `window` moves count. With `decay`, each
+    # older move's weight is multiplied by `decay` every round, but not
+    # both. Ties go to the move first played earliest, as
+    # max(history, key=history.count) would choose.
+    RESCALE_LIMIT = 1e100
+
+    def __init__(self, window=None, decay=None):
+        if window and decay:
+            raise ValueError('use a window or a decay, not both')
+
+        self.window = window
+        self.decay = decay
+        self.counts = [0] * Move.COUNT
+        self.first_seen = [None] * Move.COUNT
+        self.recent = collections.deque()
+        self.rounds = 0
+        self.weight = 1.0
+
+    def add(self, move):
+        code = move.code
+        if self.first_seen[code] is None:
+            self.first_seen[code] = self.rounds
+        self.rounds += 1
+
+        if self.decay:
+            # Growing the new move's weight is the same as shrinking all
+            # older weights, without touching every count each round.
+            self.weight /= self.decay
+            self.counts[code] += self.weight
+            if self.weight > MoveFrequency.RESCALE_LIMIT:
+                self.counts = [count / self.weight for count in self.counts]
+                self.weight = 1.0
+        else:
+            self.counts[code] += 1
+
+        if self.window:
+            self.recent.append(code)
+            if len(self.recent) > self.window:
+                self.counts[self.recent.popleft()] -= 1
+
+    def most_frequent(self):
+        played = [code for code in range(Move.COUNT)
+                  if self.first_seen[code] is not None]
+        if not played:
+            return None
+
+        code = max(played, key=lambda code: (self.counts[code],
+                                             -self.first_seen[code]))
+        return Move.ALL[code]
+
+class MoveHistory:
+    # Ring buffer of the last `capacity` move codes in an array('B'), so a
+    # player's memory stays the same size however long a match runs.
+    # Running aggregates cover every move ever added: `frequency` (see
+    # MoveFrequency) and the move-to-next-move transition counts.
+    def __init__(self, capacity=1024, frequency=None):
+        if capacity < 2:
+            raise ValueError('a move history needs room for two moves')
+
+        self.capacity = capacity
+        self.codes = array.array('B', bytes(capacity))
+        self.rounds = 0
+        self.frequency = frequency or MoveFrequency()
+        self.transitions = array.array('Q', bytes(8 * Move.COUNT ** 2))
+
+    def append(self, move):
+        if self.rounds:
+            previous = self.codes[(self.rounds - 1) % self.capacity]
+            self.transitions[previous * Move.COUNT + move.code] += 1
+
+        self.codes[self.rounds % self.capacity] = move.code
+        self.rounds += 1
+        self.frequency.add(move)
+
+    def code_at(self, index):
+        length = len(self)
+        if not -length <= index < length:
+            raise IndexError('move history index out of range')
+
+        if index < 0:
+            index += length
+        return self.codes[(self.rounds - length + index) % self.capacity]
+
+    def __getitem__(self, index):
+        return Move.ALL[self.code_at(index)]
+
+    def __len__(self):
+        return min(self.rounds, self.capacity)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def last(self, count):
+        count = min(count, len(self))
+        return [self[index] for index in range(-count, 0)]
+
+    def transitions_from(self, move):
+        start = move.code * Move.COUNT
+        return self.transitions[start:start + Move.COUNT]
 
 class Player:
     CHOICES = {'1': Rock(), '2': Paper(), '3': Scissors(),
 '4': Lizard(), '5': Spock()}
 
-    def __init__(self):
+    def __init__(self, move_frequency=None, history_capacity=1024):
         self.name = None
         self.move = None
         self.wins = 0
-        self.move_history = []
+        self.move_history = MoveHistory(history_capacity, move_frequency)
+
+    @property
+    def move_frequency(self):
+        return self.move_history.frequency
 
     def choose(self):
         pass
@@ -110,8 +258,8 @@ class Player:
         return str(self.name)
 
 class Human(Player):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, move_frequency=None, history_capacity=1024):
+        super().__init__(move_frequency, history_capacity)
 
     def ask_for_name(self):
         name = input('What\'s your name?\nEnter name: ')
@@ -158,11 +306,8 @@ class R2D2(Player):
         self.name = 'R2D2'
         self.script = 'R2D2: Beep bloop blop bleep boop!'
 
-    def choose(self, human_move_history):
-        if human_move_history[-1] == Rock():
-            self.move = Spock()
-        else:
-            self.move = Rock()
+    def choose(self, human):
+        self.move = Rock()
         self.update_move_history()
 
 class HAL(Player):
@@ -172,14 +317,14 @@ class HAL(Player):
         self.script = 'HAL: This mission is too important for me \
 to allow you to jeopardize it. If you win, I will open the pod doors.'
 
-    def choose(self, human_move_history):
-        human_freq_move = max(human_move_history, key=human_move_history.count)
+    def choose(self, human):
+        human_freq_move = human.move_frequency.most_frequent()
 
-        for choice in [Rock(), Paper(), Scissors(), Lizard(), Spock()]:
-            if human_freq_move.__class__ in choice.strengths:
-                self.move = choice
-                self.update_move_history()
-                break
+        if human_freq_move:
+            self.move = Move.COUNTERS[human_freq_move.code]
+        else:
+            self.move = random.choice(Move.ALL)
+        self.update_move_history()
 
 class Daneel(Player):
     def __init__(self):
@@ -188,16 +333,182 @@ class Daneel(Player):
         self.script = 'Daneel: The division between human and robot \
 is perhaps not as significant as that between scissors and rock. Let\'s begin.'
 
-    def choose(self, human_move_history):
-        if len(human_move_history) > 1:
-            self.move = human_move_history[-2]
+    def choose(self, human):
+        if len(human.move_history) > 1:
+            self.move = human.move_history[-2]
         else:
             self.move = random.choice(list(Player.CHOICES.values()))
         self.update_move_history()
 
+class Markov(Player):
+    # Predicts the opponent's next move from n-gram counts of every order
+    # up to `max_order` and plays its counter. Each order's counts sit in
+    # one flat array indexed by context * COUNT + next move, the context
+    # being the previous `order` moves read as a base-COUNT number, so
+    # memory is fixed up front and a round costs the same however long the
+    # match runs. Orders are mixed by how often each has guessed right.
+    MAX_ORDER = 4
+
+    def __init__(self, max_order=MAX_ORDER):
+        super().__init__()
+        self.name = 'Markov'
+        self.script = 'Markov: Everything you do follows from what you \
+did before. I have been counting.'
+        self.max_order = max_order
+        self.sizes = tuple(Move.COUNT ** order
+                           for order in range(max_order + 1))
+        self.counts = [array.array('Q', bytes(8 * size * Move.COUNT))
+                       for size in self.sizes]
+        self.hits = [0] * (max_order + 1)
+        self.trials = [0] * (max_order + 1)
+        self.guesses = [None] * (max_order + 1)
+        self.context = 0
+        self.seen = 0
+
+    def choose(self, opponent):
+        # Only moves from finished rounds count, so the opponent's move this
+        # round stays hidden whichever of the two chose first.
+        history = opponent.move_history
+        while self.seen < min(history.rounds, self.move_history.rounds):
+            self.observe(history.code_at(self.seen - history.rounds))
+
+        predicted = self.predict()
+        if predicted is None:
+            self.move = random.choice(Move.ALL)
+        else:
+            self.move = Move.COUNTERS[predicted]
+        self.update_move_history()
+
+    def observe(self, code):
+        for order, size in enumerate(self.sizes):
+            if order > self.seen:
+                break
+
+            if self.guesses[order] is not None:
+                self.trials[order] += 1
+                self.hits[order] += self.guesses[order] == code
+            context = self.context % size
+            self.counts[order][context * Move.COUNT + code] += 1
+
+        self.context = ((self.context * Move.COUNT + code)
+                        % self.sizes[self.max_order])
+        self.seen += 1
+
+    def predict(self):
+        scores = [0.0] * Move.COUNT
+        for order, size in enumerate(self.sizes):
+            start = self.context % size * Move.COUNT
+            row = self.counts[order][start:start + Move.COUNT]
+            total = sum(row)
+            if order > self.seen or not total:
+                self.guesses[order] = None
+                continue
+
+            self.guesses[order] = max(range(Move.COUNT),
+                                      key=row.__getitem__)
+            weight = (self.hits[order] + 1) / (self.trials[order] + 2)
+            for code, count in enumerate(row):
+                scores[code] += weight * count / total
+
+        if not any(scores):
+            return None
+
+        return max(range(Move.COUNT), key=scores.__getitem__)
+
+class Iocaine(Player):
+    # Predicts that the opponent will repeat what followed the longest
+    # earlier occurrence of their latest moves, and plays its counter. The
+    # moves feed an online suffix automaton, so finding that repeat costs
+    # amortized O(1) a round instead of rescanning the whole history.
+    # States live in flat arrays: TRANSITIONS[state * COUNT + code] is the
+    # next state or -1, and FIRST_ENDS holds where each state's substrings
+    # first ended. The full move sequence is kept alongside because the
+    # move history only holds the most recent moves.
+    EMPTY_ROW = array.array('i', [-1] * Move.COUNT)
+
+    def __init__(self):
+        super().__init__()
+        self.name = 'Iocaine'
+        self.script = 'Iocaine: Never go in against a Sicilian when \
+death is on the line. I remember every move you have ever made.'
+        self.sequence = array.array('B')
+        self.transitions = array.array('i')
+        self.links = array.array('i')
+        self.lengths = array.array('i')
+        self.first_ends = array.array('i')
+        self.last = self.add_state(0, -1)
+
+    def choose(self, opponent):
+        # As with Markov, only moves from finished rounds count.
+        history = opponent.move_history
+        while len(self.sequence) < min(history.rounds,
+                                       self.move_history.rounds):
+            self.extend(history.code_at(len(self.sequence)
+                                        - history.rounds))
+
+        predicted = self.predict()
+        if predicted is None:
+            self.move = random.choice(Move.ALL)
+        else:
+            self.move = Move.COUNTERS[predicted]
+        self.update_move_history()
+
+    def add_state(self, length, first_end):
+        self.transitions.extend(Iocaine.EMPTY_ROW)
+        self.links.append(-1)
+        self.lengths.append(length)
+        self.first_ends.append(first_end)
+        return len(self.lengths) - 1
+
+    def extend(self, code):
+        position = len(self.sequence)
+        self.sequence.append(code)
+        current = self.add_state(self.lengths[self.last] + 1, position)
+
+        state = self.last
+        while state != -1 and self.transitions[state * Move.COUNT
+                                               + code] == -1:
+            self.transitions[state * Move.COUNT + code] = current
+            state = self.links[state]
+
+        if state == -1:
+            self.links[current] = 0
+        else:
+            target = self.transitions[state * Move.COUNT + code]
+            if self.lengths[state] + 1 == self.lengths[target]:
+                self.links[current] = target
+            else:
+                clone = self.add_state(self.lengths[state] + 1,
+                                       self.first_ends[target])
+                start = target * Move.COUNT
+                self.transitions[clone * Move.COUNT:
+                                 (clone + 1) * Move.COUNT] = (
+                    self.transitions[start:start + Move.COUNT])
+                self.links[clone] = self.links[target]
+                while state != -1 and self.transitions[state * Move.COUNT
+                                                       + code] == target:
+                    self.transitions[state * Move.COUNT + code] = clone
+                    state = self.links[state]
+                self.links[target] = self.links[current] = clone
+
+        self.last = current
+
+    def match_length(self):
+        # Length of the longest suffix of the moves so far that also
+        # occurred earlier.
+        match = self.links[self.last]
+        return self.lengths[match] if match > 0 else 0
+
+    def predict(self):
+        match = self.links[self.last]
+        if match <= 0:
+            return None
+
+        return self.sequence[self.first_ends[match] + 1]
+
 class RPSGame:
     WIN_COUNT = 4
-    OPPONENTS = [R2D2(), Daneel(), HAL()]
+    OPPONENTS = [R2D2(), Daneel(), HAL(), Markov(), Iocaine()]
 
     def __init__(self):
         self._human = Human()
@@ -214,17 +525,14 @@ class RPSGame:
         print('Thanks for playing Rock Paper Scissors Lizard Spock. \
 Goodbye!\n')
 
-    def _human_wins(self):
-        human_move = self._human.move
-        computer_move = self._computer.move
+    def _round_outcome(self):
+        return self._human.move.outcome_against(self._computer.move)
 
-        return computer_move.__class__ in human_move.strengths
+    def _human_wins(self):
+        return self._round_outcome() == 1
 
     def _computer_wins(self):
-        human_move = self._human.move
-        computer_move = self._computer.move
-
-        return human_move.__class__ in computer_move.strengths
+        return self._round_outcome() == -1
 
     def _display_winner(self):
         print(f'You chose: {self._human.move}')
@@ -234,7 +542,7 @@ Goodbye!\n')
 
         if self._human_wins():
             print(f'{self._human.move}\
- {self._human.move.strengths[self._computer.move.__class__]}\
+ {self._human.move.verb_against(self._computer.move)}\
  {self._computer.move}')
             print()
             ScreenControl.pause()
@@ -242,7 +550,7 @@ Goodbye!\n')
             print()
         elif self._computer_wins():
             print(f'{self._computer.move}\
- {self._computer.move.strengths[self._human.move.__class__]}\
+ {self._computer.move.verb_against(self._human.move)}\
  {self._human.move}')
             ScreenControl.pause()
             print('Computer wins!')
@@ -305,7 +613,8 @@ Goodbye!\n')
 
         choice = input('Your choice: ')
 
-        while not choice or choice not in '123':
+        while choice not in [str(number) for number
+                             in range(1, len(RPSGame.OPPONENTS) + 1)]:
             ScreenControl.transition()
             print('Invalid input. Please select an opponent.')
             for idx, opponent in enumerate(RPSGame.OPPONENTS):
@@ -333,7 +642,7 @@ Goodbye!\n')
 
         while True:
             self._human.choose()
-            self._computer.choose(self._human.move_history)
+            self._computer.choose(self._human)
             self._display_winner()
             self._update_scores()
             self._display_scores()
@@ -346,5 +655,6 @@ Goodbye!\n')
         self._display_goodbye_message()
 
 
-game = RPSGame()
-game.play()
+if __name__ == '__main__':
+    game = RPSGame()
+    game.play()
@@ -0,0 +1,199 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import random
+import time
+
+from rps import HAL, R2D2, Daneel, Iocaine, Markov, Move, Player
+
+
+class ScriptedPlayer(Player):
+    # Human-like move generators for headless play. Like the bots, they
+    # choose after seeing the opponent's history.
+    def __init__(self, rng=random):
+        super().__init__()
+        self.name = self.__class__.__name__
+        self.rng = rng
+
+    def choose(self, opponent):
+        self.move = self.next_move(opponent)
+        self.update_move_history()
+
+    def next_move(self, opponent):
+        return self.rng.choice(Move.ALL)
+
+class RandomPlayer(ScriptedPlayer):
+    pass
+
+class RockLover(ScriptedPlayer):
+    # Falls back on Rock half the time.
+    def next_move(self, opponent):
+        if self.rng.random() < 0.5:
+            return Move.ALL[0]
+
+        return super().next_move(opponent)
+
+class Cycler(ScriptedPlayer):
+    def next_move(self, opponent):
+        return Move.ALL[self.move_history.rounds % Move.COUNT]
+
+class Copycat(ScriptedPlayer):
+    # Plays whatever the opponent played last.
+    def next_move(self, opponent):
+        if opponent.move_history:
+            return opponent.move_history[-1]
+
+        return super().next_move(opponent)
+
+class WinStayLoseShift(ScriptedPlayer):
+    # Repeats a winning move; otherwise switches to what would have beaten
+    # the opponent's last move.
+    def next_move(self, opponent):
+        if not self.move_history or not opponent.move_history:
+            return super().next_move(opponent)
+
+        mine, theirs = self.move_history[-1], opponent.move_history[-1]
+        if mine.outcome_against(theirs) == 1:
+            return mine
+
+        return Move.COUNTERS[theirs.code]
+
+PLAYERS = {
+    'r2d2': lambda rng: R2D2(),
+    'hal': lambda rng: HAL(),
+    'daneel': lambda rng: Daneel(),
+    'markov': lambda rng: Markov(),
+    'iocaine': lambda rng: Iocaine(),
+    'random': RandomPlayer,
+    'rock_lover': RockLover,
+    'cycler': Cycler,
+    'copycat': Copycat,
+    'win_stay': WinStayLoseShift,
+}
+
+
+def play_rounds(first_name, second_name, rounds, seed):
+    # Runs in a worker process. Each seat chooses against a record of the
+    # other's finished rounds, which only takes this round's move once both
+    # have chosen, so neither sees the move it is playing against. Returns
+    # `first`'s wins, ties and losses.
+    random.seed(seed)
+    rng = random.Random(seed)
+    first = PLAYERS[first_name](rng)
+    second = PLAYERS[second_name](rng)
+    first_record, second_record = Player(), Player()
+    results = [0, 0, 0]
+
+    for _ in range(rounds):
+        first.choose(second_record)
+        second.choose(first_record)
+        for player, record in ((first, first_record),
+                               (second, second_record)):
+            record.move = player.move
+            record.update_move_history()
+        results[1 - first.move.outcome_against(second.move)] += 1
+
+    return tuple(results)
+
+
+class Tournament:
+    # Every pair plays `rounds` rounds in each seat order, in chunks that
+    # are independent matches with their own seeds.
+    CHUNK_SIZE = 100_000
+
+    def __init__(self, players, rounds, seed=0, workers=None):
+        self.players = players
+        self.rounds = rounds
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+
+    def chunks(self):
+        seed = self.seed
+        for first, second in itertools.permutations(self.players, 2):
+            for start in range(0, self.rounds, Tournament.CHUNK_SIZE):
+                rounds = min(Tournament.CHUNK_SIZE, self.rounds - start)
+                yield first, second, rounds, seed
+                seed += 1
+
+    def play(self):
+        results = collections.defaultdict(lambda: [0, 0, 0])
+        start = time.perf_counter()
+
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+            futures = {pool.submit(play_rounds, *chunk): chunk[:2]
+                       for chunk in self.chunks()}
+            for future in concurrent.futures.as_completed(futures):
+                first, second = futures[future]
+                wins, ties, losses = future.result()
+                for player, opponent, outcome in ((first, second,
+                                                   (wins, ties, losses)),
+                                                  (second, first,
+                                                   (losses, ties, wins))):
+                    totals = results[(player, opponent)]
+                    for index, count in enumerate(outcome):
+                        totals[index] += count
+
+        return TournamentResults(self.players, results,
+                                 time.perf_counter() - start)
+
+class TournamentResults:
+    def __init__(self, players, results, seconds):
+        self.players = players
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def rounds(self):
+        return sum(sum(counts) for counts in self.results.values()) // 2
+
+    def rounds_per_second(self):
+        return self.rounds / self.seconds if self.seconds else 0.0
+
+    def matrix(self):
+        # Row player's win/tie/loss percentages against each column player.
+        width = max(len(name) for name in self.players) + 2
+        cell = 17
+        lines = [' ' * width + ''.join(f"{name:>{cell}}"
+                                       for name in self.players)]
+        for player in self.players:
+            cells = []
+            for opponent in self.players:
+                if player == opponent:
+                    cells.append(f"{'-':>{cell}}")
+                    continue
+
+                counts = self.results[(player, opponent)]
+                total = sum(counts)
+                text = '/'.join(f"{count / total:.0%}" for count in counts)
+                cells.append(f"{text:>{cell}}")
+            lines.append(f"{player:<{width}}" + ''.join(cells))
+
+        lines.append(f"(win/tie/loss for the row player) {self.rounds:,} "
+                     f"rounds in {self.seconds:.2f}s "
+                     f"({self.rounds_per_second():,.0f} rounds/s)")
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Pit Rock Paper Scissors Lizard Spock players against '
+                    'each other.')
+    parser.add_argument('players', nargs='*',
+                        help=f"any of {', '.join(PLAYERS)} (default: all)")
+    parser.add_argument('--rounds', type=int, default=100_000,
+                        help='rounds per pair in each seat order')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    players = list(dict.fromkeys(args.players)) or list(PLAYERS)
+    unknown = set(players) - set(PLAYERS)
+    if unknown:
+        parser.error(f"unknown players: {', '.join(sorted(unknown))}")
+    if len(players) < 2:
+        parser.error('a tournament needs at least two players')
+
+    print(Tournament(players, args.rounds, args.seed, args.workers)
+          .play().matrix())
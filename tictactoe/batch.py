@@ -0,0 +1,45 @@
+import numpy as np
+
+from tictactoe import Board, Square
+
+
+# Cell values in an (N, 9) board array. Column `key - 1` holds square `key`.
+EMPTY = 0
+FIRST = 1   # Square.HUMAN_MARKER, who always moves first
+SECOND = 2  # Square.COMPUTER_MARKER
+
+CELL_VALUES = {Square.HUMAN_MARKER: FIRST, Square.COMPUTER_MARKER: SECOND}
+
+# (8, 3) column indexes of the winning rows, for fancy indexing.
+WINNING_ROWS = np.array(Board.WINNING_ROWS, dtype=np.intp) - 1
+
+
+def to_array(boards):
+    array = np.zeros((len(boards), len(Board.KEYS)), dtype=np.int8)
+    for index, board in enumerate(boards):
+        for marker, value in CELL_VALUES.items():
+            bits = board.bits_for(marker)
+            for key in Board.KEYS:
+                if bits & Board.bit_for(key):
+                    array[index, key - 1] = value
+
+    return array
+
+def evaluate(boards):
+    # Returns (winner, is_full, legal) for every board at once: the winning
+    # cell value or EMPTY as int8, a bool per board, and an (N, 9) bool mask
+    # of unused squares, as Board.unused_squares would list them.
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != len(Board.KEYS):
+        raise ValueError(f"expected an (N, {len(Board.KEYS)}) array of "
+                         f"boards, got shape {boards.shape}")
+
+    lines = boards[:, WINNING_ROWS]
+    first_wins = (lines == FIRST).all(axis=2).any(axis=1)
+    second_wins = (lines == SECOND).all(axis=2).any(axis=1)
+    winner = np.where(first_wins, FIRST,
+                      np.where(second_wins, SECOND, EMPTY)).astype(np.int8)
+
+    legal = boards == EMPTY
+    is_full = ~legal.any(axis=1)
+    return winner, is_full, legal
@@ -0,0 +1,180 @@
+import argparse
+import copy
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+from tictactoe import (Board, DecisionCache, HeuristicStrategy,
+                       RandomStrategy, Square, TTTGame)
+from selfplay import play_game
+
+
+class Benchmark:
+    BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'bench_baseline.json')
+    CORPUS_SIZE = 2_000
+    REPEATS = 5
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.positions = self.corpus()
+
+    def corpus(self):
+        # Seeded unfinished positions after 1, 3, 5 or 7 random moves. The
+        # human moves first, so each one is the computer's turn.
+        rng = random.Random(self.seed)
+        positions = []
+
+        while len(positions) < Benchmark.CORPUS_SIZE:
+            game = TTTGame()
+            markers = (Square.HUMAN_MARKER, Square.COMPUTER_MARKER)
+            for turn in range(rng.randrange(1, 9, 2)):
+                key = rng.choice(game.board.unused_squares())
+                game.board.mark_square_at(key, markers[turn % 2])
+                if game.is_game_over():
+                    break
+            else:
+                positions.append(game)
+
+        return positions
+
+    @staticmethod
+    def best_time(run, operations, setup=None):
+        # Best of several runs, in nanoseconds per operation. Like timeit,
+        # garbage collection is paused while a run is timed.
+        best = None
+        for _ in range(Benchmark.REPEATS):
+            arg = setup() if setup else None
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                run(arg)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best * 1e9 / operations
+
+    def bench_is_game_over(self):
+        positions = self.positions
+
+        def run(_):
+            for game in positions:
+                game.is_game_over()
+
+        return Benchmark.best_time(run, len(positions))
+
+    def bench_unused_squares(self):
+        boards = [game.board for game in self.positions]
+
+        def run(_):
+            for board in boards:
+                board.unused_squares()
+
+        return Benchmark.best_time(run, len(boards))
+
+    def bench_computer_moves(self):
+        # computer_moves marks the board, so each run gets fresh copies,
+        # made outside the timed loop. The copies share one decision cache,
+        # which the first run fills, so the best run times the cache hits
+        # that long self-play runs mostly see.
+        decision_cache = DecisionCache()
+        return self.time_computer_moves(lambda: decision_cache)
+
+    def bench_computer_moves_cold(self):
+        # The cache-miss path: every run starts from an empty cache.
+        return self.time_computer_moves(DecisionCache)
+
+    def time_computer_moves(self, cache_for_run):
+        def setup():
+            random.seed(self.seed)
+            games = copy.deepcopy(self.positions)
+            decision_cache = cache_for_run()
+            for game in games:
+                game.decision_cache = decision_cache
+            return games
+
+        def run(games):
+            for game in games:
+                game.computer_moves()
+
+        return Benchmark.best_time(run, len(self.positions), setup)
+
+    def bench_headless_game(self):
+        games = Benchmark.CORPUS_SIZE // 4
+        board = Board()
+
+        def run(_):
+            rng = random.Random(self.seed)
+            first = HeuristicStrategy(rng)
+            second = RandomStrategy(rng)
+            for _ in range(games):
+                play_game(first, second, board)
+
+        return Benchmark.best_time(run, games)
+
+    def run(self):
+        return {name[len('bench_'):]: getattr(self, name)()
+                for name in sorted(dir(self)) if name.startswith('bench_')}
+
+
+def compare(results, baseline, margin):
+    # Returns the names of benchmarks slower than baseline by over `margin`.
+    regressions = []
+    for name, nanoseconds in results.items():
+        if name not in baseline:
+            continue
+
+        limit = baseline[name] * (1 + margin)
+        if nanoseconds > limit:
+            regressions.append(name)
+
+    return regressions
+
+def report(results, baseline):
+    lines = [f"{'benchmark':<18}{'ns/op':>12}{'baseline':>12}{'change':>9}"]
+    for name, nanoseconds in results.items():
+        if name in baseline:
+            change = nanoseconds / baseline[name] - 1
+            lines.append(f"{name:<18}{nanoseconds:>12,.0f}"
+                         f"{baseline[name]:>12,.0f}{change:>+9.1%}")
+        else:
+            lines.append(f"{name:<18}{nanoseconds:>12,.0f}"
+                         f"{'-':>12}{'-':>9}")
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Time the tictactoe hot paths against a saved baseline.')
+    parser.add_argument('--save', action='store_true',
+                        help='store this run as the new baseline')
+    parser.add_argument('--baseline', default=Benchmark.BASELINE_PATH)
+    parser.add_argument('--margin', type=float, default=0.10,
+                        help='allowed slowdown before failing (0.10 = 10%%)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = Benchmark(args.seed).run()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    print(report(results, baseline))
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+    else:
+        regressions = compare(results, baseline, args.margin)
+        if regressions:
+            print(f"Slower than baseline by more than {args.margin:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,233 @@
+import argparse
+import functools
+import math
+import time
+
+from mcts import masks_through
+from tictactoe import Board, TTTGame
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@functools.cache
+def search_tables(size, run):
+    # Row masks for the evaluation, and Board's (other squares, last square
+    # bit, last square key) threat entries for move ordering.
+    rows, _, _ = Board.geometry(size, run)
+    return (tuple(Board.mask_for(row) for row in rows),
+            Board.threats_for(rows))
+
+
+class DeepeningPlayer:
+    # Iterative-deepening negamax with alpha-beta for any board size. Each
+    # iteration starts from the transposition table the last one filled, so
+    # its best moves are searched first. After that come winning squares,
+    # then blocks (the same threats HeuristicStrategy.forced_move checks),
+    # then killer moves and history scores.
+    # The table is kept between moves, so decisive scores are stored as
+    # plies to the win from the stored position rather than from the root.
+    WIN_SCORE = 1_000_000
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+    CHECK_EVERY = 1024
+    MAX_TABLE_SIZE = 1_000_000
+
+    def __init__(self, seconds=1.0, max_depth=None):
+        self.seconds = seconds
+        self.max_depth = max_depth
+        self.table = {}
+        self.geometry = None
+        self.moves = []
+
+    def choose(self, board, marker, opponent_marker):
+        self.masks, self.threats = search_tables(board.size, board.run)
+        self.rows_through = masks_through(board.size, board.run)
+        self.run = board.run
+        self.full_mask = board.full_mask
+        self.killers = {}
+        self.history = {}
+        self.nodes = 0
+        self.mate_bound = DeepeningPlayer.WIN_SCORE - len(board.keys)
+        if (len(self.table) > DeepeningPlayer.MAX_TABLE_SIZE
+                or self.geometry != (board.size, board.run)):
+            self.table.clear()
+            self.geometry = (board.size, board.run)
+
+        player_bits = board.bits_for(marker)
+        opponent_bits = board.bits_for(opponent_marker)
+        empty = len(board.unused_squares())
+        max_depth = min(self.max_depth or empty, empty)
+
+        start = time.perf_counter()
+        self.deadline = start + self.seconds
+        best_move = self.ordered_moves(player_bits, opponent_bits, 0)[0]
+        depth_reached = 0
+
+        try:
+            for depth in range(1, max_depth + 1):
+                score, move = self.search_root(player_bits, opponent_bits,
+                                               depth)
+                best_move, depth_reached = move, depth
+                if abs(score) >= self.mate_bound:
+                    break
+        except SearchTimeout:
+            pass
+
+        self.moves.append((self.nodes, depth_reached,
+                           time.perf_counter() - start))
+        return best_move
+
+    def search_root(self, player_bits, opponent_bits, depth):
+        alpha, beta = -math.inf, math.inf
+        best_move = None
+
+        for key in self.ordered_moves(player_bits, opponent_bits, 0):
+            score = -self.negamax(opponent_bits,
+                                  player_bits | Board.bit_for(key),
+                                  depth - 1, 1, -beta, -alpha, key)
+            if score > alpha:
+                alpha, best_move = score, key
+
+        self.table[(player_bits, opponent_bits)] = (depth, alpha,
+                                                     DeepeningPlayer.EXACT,
+                                                     best_move)
+        return alpha, best_move
+
+    def negamax(self, player_bits, opponent_bits, depth, ply, alpha, beta,
+                last_key):
+        self.nodes += 1
+        if self.nodes % DeepeningPlayer.CHECK_EVERY == 0:
+            if time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+
+        if self.completes_row(opponent_bits, last_key):
+            return -(DeepeningPlayer.WIN_SCORE - ply)
+        if (player_bits | opponent_bits) == self.full_mask:
+            return 0
+        if depth == 0:
+            return self.evaluate(player_bits, opponent_bits)
+
+        position = (player_bits, opponent_bits)
+        entry = self.table.get(position)
+        if entry and entry[0] >= depth:
+            _, score, flag, _ = entry
+            score = self.from_table(score, ply)
+            if flag == DeepeningPlayer.EXACT:
+                return score
+            if flag == DeepeningPlayer.LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        original_alpha = alpha
+        best_score, best_move = -math.inf, None
+
+        for key in self.ordered_moves(player_bits, opponent_bits, ply):
+            score = -self.negamax(opponent_bits,
+                                  player_bits | Board.bit_for(key),
+                                  depth - 1, ply + 1, -beta, -alpha, key)
+            if score > best_score:
+                best_score, best_move = score, key
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.record_cutoff(key, ply, depth)
+                break
+
+        if best_score <= original_alpha:
+            flag = DeepeningPlayer.UPPER
+        elif best_score >= beta:
+            flag = DeepeningPlayer.LOWER
+        else:
+            flag = DeepeningPlayer.EXACT
+        self.table[position] = (depth, self.to_table(best_score, ply), flag,
+                                best_move)
+        return best_score
+
+    def to_table(self, score, ply):
+        if score >= self.mate_bound:
+            return score + ply
+        if score <= -self.mate_bound:
+            return score - ply
+        return score
+
+    def from_table(self, score, ply):
+        if score >= self.mate_bound:
+            return score - ply
+        if score <= -self.mate_bound:
+            return score + ply
+        return score
+
+    def completes_row(self, bits, key):
+        return any(bits & mask == mask for mask in self.rows_through[key])
+
+    def record_cutoff(self, key, ply, depth):
+        killers = self.killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def winning_keys(self, bits, occupied):
+        return [key for others, bit, key in self.threats
+                if bits & others == others and not occupied & bit]
+
+    def ordered_moves(self, player_bits, opponent_bits, ply):
+        occupied = player_bits | opponent_bits
+        free = self.full_mask & ~occupied
+        moves = []
+        while free:
+            bit = free & -free
+            moves.append(bit.bit_length())
+            free ^= bit
+
+        entry = self.table.get((player_bits, opponent_bits))
+        first = [entry[3]] if entry and entry[3] else []
+        first += self.winning_keys(player_bits, occupied)
+        first += self.winning_keys(opponent_bits, occupied)
+        first += [key for key in self.killers.get(ply, ())
+                  if not occupied & Board.bit_for(key)]
+        first = list(dict.fromkeys(first))
+
+        rest = [key for key in moves if key not in first]
+        rest.sort(key=lambda key: self.history.get(key, 0), reverse=True)
+        return first + rest
+
+    def evaluate(self, player_bits, opponent_bits):
+        # Rows still open to only one player, weighted by how full they are.
+        score = 0
+        for mask in self.masks:
+            mine = player_bits & mask
+            theirs = opponent_bits & mask
+            if mine and not theirs:
+                score += 4 ** mine.bit_count()
+            elif theirs and not mine:
+                score -= 4 ** theirs.bit_count()
+
+        return score
+
+    def report(self):
+        lines = [f"{'move':<6}{'nodes':>10}{'depth':>7}{'ms':>9}"]
+        for number, (nodes, depth, seconds) in enumerate(self.moves, 1):
+            lines.append(f"{number:<6}{nodes:>10,}{depth:>7}"
+                         f"{seconds * 1000:>9.1f}")
+
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Play Tic Tac Toe against iterative-deepening search.')
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--run', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    parser.add_argument('--max-depth', type=int)
+    args = parser.parse_args()
+
+    player = DeepeningPlayer(args.seconds, args.max_depth)
+    TTTGame(strategy=player, size=args.size, run=args.run).play()
+    print(player.report())
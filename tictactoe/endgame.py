@@ -0,0 +1,273 @@
+import argparse
+import array
+import bisect
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+from tictactoe import Board, TTTGame
+
+
+class Geometry4x4:
+    # Lookup tables for one 4x4 variant. A 16-bit bitboard is transformed
+    # one byte at a time through per-symmetry tables.
+    SIZE = 4
+    KEYS = tuple(range(1, 17))
+    FULL_MASK = (1 << 16) - 1
+
+    def __init__(self, run):
+        rows, _, _ = Board.geometry(Geometry4x4.SIZE, run)
+        masks = [Board.mask_for(row) for row in rows]
+        self.run = run
+        self.winning = bytes(any(bits & mask == mask for mask in masks)
+                             for bits in range(Geometry4x4.FULL_MASK + 1))
+        self.low = []
+        self.high = []
+        for permutation in Geometry4x4.permutations():
+            self.low.append(tuple(self.transform(bits, permutation)
+                                  for bits in range(256)))
+            self.high.append(tuple(self.transform(bits << 8, permutation)
+                                   for bits in range(256)))
+
+    @staticmethod
+    def permutations():
+        # The eight symmetries of the square, as the key each square moves
+        # to.
+        def key(row, col):
+            return row * Geometry4x4.SIZE + col + 1
+
+        last = Geometry4x4.SIZE - 1
+        maps = (lambda r, c: (r, c), lambda r, c: (c, last - r),
+                lambda r, c: (last - r, last - c), lambda r, c: (last - c, r),
+                lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+                lambda r, c: (c, r), lambda r, c: (last - c, last - r))
+        return [tuple(key(*moved(row, col))
+                      for row in range(Geometry4x4.SIZE)
+                      for col in range(Geometry4x4.SIZE))
+                for moved in maps]
+
+    @staticmethod
+    def transform(bits, permutation):
+        result = 0
+        for key, target in zip(Geometry4x4.KEYS, permutation):
+            if bits & Board.bit_for(key):
+                result |= Board.bit_for(target)
+
+        return result
+
+    def canonical(self, player_bits, opponent_bits):
+        # Positions are (player to move, opponent) pairs packed into 32 bits.
+        return min(((low[player_bits & 0xFF] | high[player_bits >> 8]) << 16)
+                   | low[opponent_bits & 0xFF] | high[opponent_bits >> 8]
+                   for low, high in zip(self.low, self.high))
+
+
+class EndgameTablebase:
+    PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'endgame4x4.tablebase')
+
+    # File layout: MAGIC, run length, padding, entry count, then the sorted
+    # canonical positions as little-endian uint32s, then one 7-bit entry per
+    # position packed end to end. An entry is the result for the player to
+    # move in the low two bits and the plies until the game ends above them.
+    MAGIC = b'TT4'
+    HEADER = struct.Struct('<3sBI')
+    ENTRY_BITS = 7
+    ENTRY_MASK = (1 << ENTRY_BITS) - 1
+    WIN = 1
+    DRAW = 2
+    LOSS = 3
+    RESULTS = {WIN: 'win', DRAW: 'draw', LOSS: 'loss'}
+
+    def __init__(self, path=PATH):
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.run, self.count = EndgameTablebase.HEADER.unpack_from(
+            self.data)
+        if magic != EndgameTablebase.MAGIC:
+            raise ValueError(f"{path} is not a 4x4 endgame tablebase")
+
+        keys_end = EndgameTablebase.HEADER.size + 4 * self.count
+        self.positions = memoryview(self.data)[
+            EndgameTablebase.HEADER.size:keys_end].cast('I')
+        self.values_offset = keys_end
+        self.geometry = Geometry4x4(self.run)
+
+    def probe(self, player_bits, opponent_bits):
+        # Returns (result, plies to the end) for the player to move.
+        position = self.geometry.canonical(player_bits, opponent_bits)
+        index = bisect.bisect_left(self.positions, position)
+        if index == self.count or self.positions[index] != position:
+            raise KeyError('position is not reachable')
+
+        bit = index * EndgameTablebase.ENTRY_BITS
+        start = self.values_offset + bit // 8
+        word = int.from_bytes(self.data[start:start + 2], 'little')
+        entry = (word >> (bit % 8)) & EndgameTablebase.ENTRY_MASK
+        return entry & 0b11, entry >> 2
+
+    def choose(self, board, marker, opponent_marker):
+        if board.size != Geometry4x4.SIZE or board.run != self.run:
+            raise ValueError(f"this tablebase plays 4x4 with {self.run} in "
+                             "a row")
+
+        player_bits = board.bits_for(marker)
+        opponent_bits = board.bits_for(opponent_marker)
+        return min(board.unused_squares(),
+                   key=lambda key: EndgameTablebase.preference(
+                       *self.probe(opponent_bits,
+                                   player_bits | Board.bit_for(key))))
+
+    @staticmethod
+    def preference(result, plies):
+        # Sort key for a move, given the result for the opponent afterwards:
+        # quickest win first, then draws, then the slowest loss.
+        if result == EndgameTablebase.LOSS:
+            return (0, plies)
+        if result == EndgameTablebase.DRAW:
+            return (1, plies)
+        return (2, -plies)
+
+    def close(self):
+        self.positions.release()
+        self.data.close()
+
+    @staticmethod
+    def build(run=4, path=PATH):
+        geometry = Geometry4x4(run)
+        levels = EndgameTablebase.reachable(geometry)
+        values = {}
+
+        # Retrograde pass: the last level holds only finished games, and
+        # every position's children sit one level later, so each level can
+        # be solved from the one after it.
+        for level in reversed(levels):
+            for position, (player_bits, opponent_bits) in level.items():
+                values[position] = EndgameTablebase.solve(
+                    geometry, values, player_bits, opponent_bits)
+
+        positions = sorted(values)
+        packed = bytearray((len(positions) * EndgameTablebase.ENTRY_BITS + 7)
+                           // 8 + 1)
+        for index, position in enumerate(positions):
+            result, plies = values[position]
+            bit = index * EndgameTablebase.ENTRY_BITS
+            entry = result | plies << 2
+            packed[bit // 8] |= (entry << (bit % 8)) & 0xFF
+            packed[bit // 8 + 1] |= entry >> (8 - bit % 8)
+
+        keys = array.array('I', positions)
+        if sys.byteorder != 'little':
+            keys.byteswap()
+
+        with open(path, 'wb') as file:
+            file.write(EndgameTablebase.HEADER.pack(EndgameTablebase.MAGIC,
+                                                    run, len(positions)))
+            file.write(keys.tobytes())
+            file.write(packed)
+
+        return len(positions)
+
+    @staticmethod
+    def reachable(geometry):
+        # Canonical positions by number of marks, each with one
+        # representative (player to move, opponent) pair. Play stops once
+        # someone has won.
+        levels = [{geometry.canonical(0, 0): (0, 0)}]
+        for _ in Geometry4x4.KEYS:
+            next_level = {}
+            for player_bits, opponent_bits in levels[-1].values():
+                if geometry.winning[opponent_bits]:
+                    continue
+
+                occupied = player_bits | opponent_bits
+                for key in Geometry4x4.KEYS:
+                    bit = Board.bit_for(key)
+                    if occupied & bit:
+                        continue
+                    child = (opponent_bits, player_bits | bit)
+                    position = geometry.canonical(*child)
+                    if position not in next_level:
+                        next_level[position] = child
+            levels.append(next_level)
+
+        return levels
+
+    @staticmethod
+    def solve(geometry, values, player_bits, opponent_bits):
+        if geometry.winning[opponent_bits]:
+            return EndgameTablebase.LOSS, 0
+
+        occupied = player_bits | opponent_bits
+        if occupied == Geometry4x4.FULL_MASK:
+            return EndgameTablebase.DRAW, 0
+
+        best = None
+        for key in Geometry4x4.KEYS:
+            bit = Board.bit_for(key)
+            if occupied & bit:
+                continue
+            child = values[geometry.canonical(opponent_bits,
+                                              player_bits | bit)]
+            if best is None or (EndgameTablebase.preference(*child) <
+                                EndgameTablebase.preference(*best)):
+                best = child
+
+        result, plies = best
+        if result == EndgameTablebase.LOSS:
+            result = EndgameTablebase.WIN
+        elif result == EndgameTablebase.WIN:
+            result = EndgameTablebase.LOSS
+        return result, plies + 1
+
+
+def lookup_latency(tablebase, samples=10_000, seed=0):
+    # Mean seconds per probe over random reachable positions.
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < samples:
+        board = Board(Geometry4x4.SIZE, tablebase.run)
+        markers = list(Board.OPPONENTS)
+        for turn in range(rng.randrange(len(Geometry4x4.KEYS))):
+            board.mark_square_at(rng.choice(board.unused_squares()),
+                                 markers[turn % 2])
+            if board.is_game_over():
+                break
+        mover = len(board.moves) % 2
+        positions.append((board.bits_for(markers[mover]),
+                          board.bits_for(markers[1 - mover])))
+
+    start = time.perf_counter()
+    for player_bits, opponent_bits in positions:
+        tablebase.probe(player_bits, opponent_bits)
+    return (time.perf_counter() - start) / samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Build or play with the 4x4 endgame tablebase.')
+    parser.add_argument('mode', choices=('build', 'play'))
+    parser.add_argument('--run', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.mode == 'build':
+        start = time.perf_counter()
+        count = EndgameTablebase.build(args.run)
+        elapsed = time.perf_counter() - start
+        tablebase = EndgameTablebase()
+        print(f"Solved {count:,} canonical positions in {elapsed:.1f}s")
+        print(f"Table size: {os.path.getsize(EndgameTablebase.PATH):,} bytes")
+        print(f"Lookup latency: "
+              f"{lookup_latency(tablebase) * 1e6:.1f}µs per probe")
+        result, plies = tablebase.probe(0, 0)
+        print(f"Empty board: {EndgameTablebase.RESULTS[result]} for the "
+              f"first player in {plies} plies")
+        tablebase.close()
+    else:
+        tablebase = EndgameTablebase()
+        TTTGame(strategy=tablebase, size=Geometry4x4.SIZE,
+                run=tablebase.run).play()
@@ -0,0 +1,86 @@
+import numpy as np
+
+from batch import EMPTY, FIRST, SECOND, WINNING_ROWS, evaluate
+from tictactoe import Board
+
+
+class VectorEnv:
+    # Runs `num_envs` games in lockstep on one (num_envs, 9) int8 array. The
+    # agent plays X and moves first; the opponent replies with
+    # TTTGame.heuristic_move's chain, computed for every board at once.
+    # Finished boards are reset in place, so `step` always returns boards
+    # that are ready for the next action.
+    WIN_REWARD = 1.0
+    LOSS_REWARD = -1.0
+    DRAW_REWARD = 0.0
+    ILLEGAL_REWARD = -1.0
+    CENTER = 5 - 1  # square 5, as in HeuristicStrategy.forced_move
+
+    def __init__(self, num_envs, seed=None):
+        self.num_envs = num_envs
+        self.boards = np.zeros((num_envs, len(Board.KEYS)), dtype=np.int8)
+        self.rng = np.random.default_rng(seed)
+        self.envs = np.arange(num_envs)
+
+    def reset(self):
+        self.boards[:] = EMPTY
+        return self.boards.copy()
+
+    def step(self, actions):
+        # `actions` holds one square index (key - 1) per board. An action on
+        # a used square ends that game with ILLEGAL_REWARD.
+        actions = np.asarray(actions, dtype=np.intp)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+
+        illegal = self.boards[self.envs, actions] != EMPTY
+        legal = ~illegal
+        self.boards[self.envs[legal], actions[legal]] = FIRST
+        winner, is_full, unused = evaluate(self.boards)
+
+        won = legal & (winner == FIRST)
+        done = illegal | won | is_full
+        rewards[illegal] = VectorEnv.ILLEGAL_REWARD
+        rewards[won] = VectorEnv.WIN_REWARD
+
+        active = ~done
+        replies = self.opponent_moves(unused)
+        self.boards[self.envs[active], replies[active]] = SECOND
+        winner, is_full, _ = evaluate(self.boards)
+
+        lost = active & (winner == SECOND)
+        drawn = active & ~lost & is_full
+        rewards[lost] = VectorEnv.LOSS_REWARD
+        rewards[drawn] = VectorEnv.DRAW_REWARD
+        done |= lost | drawn
+
+        self.boards[done] = EMPTY
+        return self.boards.copy(), rewards, done
+
+    def opponent_moves(self, unused):
+        # Win if possible, else block, else take the center, else play a
+        # random unused square; the first matching row wins ties, as in
+        # Board.winning_square.
+        lines = self.boards[:, WINNING_ROWS]
+        empty = lines == EMPTY
+
+        can_win, winning = self.threat_squares(lines, empty, SECOND)
+        can_block, blocking = self.threat_squares(lines, empty, FIRST)
+        center_free = unused[:, VectorEnv.CENTER]
+
+        priorities = self.rng.random(unused.shape)
+        priorities[~unused] = -1.0
+        random_squares = priorities.argmax(axis=1)
+
+        return np.where(can_win, winning,
+                        np.where(can_block, blocking,
+                                 np.where(center_free, VectorEnv.CENTER,
+                                          random_squares)))
+
+    def threat_squares(self, lines, empty, value):
+        # A threat row has all but one square taken by `value` and the last
+        # one empty.
+        owned = (lines == value).sum(axis=2)
+        threats = (owned == WINNING_ROWS.shape[1] - 1) & empty.any(axis=2)
+        rows = threats.argmax(axis=1)
+        cells = empty[self.envs, rows].argmax(axis=1)
+        return threats.any(axis=1), WINNING_ROWS[rows, cells]
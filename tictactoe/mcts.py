@@ -0,0 +1,207 @@
+import argparse
+import concurrent.futures
+import math
+import os
+import random
+import time
+
+from tictactoe import Board, TTTGame
+
+
+def masks_through(size, run):
+    return Board.masks(size, run)[1]
+
+
+class Node:
+    # `mover_bits` belongs to the player who made `move`; `player_bits`
+    # belongs to the player to move next. `score` is from the mover's point
+    # of view: 1 per win and 0.5 per draw.
+    def __init__(self, parent, move, player_bits, mover_bits, full_mask,
+                 is_win):
+        self.parent = parent
+        self.move = move
+        self.player_bits = player_bits
+        self.mover_bits = mover_bits
+        self.children = []
+        self.visits = 0
+        self.score = 0.0
+        self.is_terminal = (is_win or
+                            (player_bits | mover_bits) == full_mask)
+        self.result = 1.0 if is_win else 0.5
+        self.untried = ([] if self.is_terminal
+                        else Node.free_keys(full_mask & ~(player_bits |
+                                                          mover_bits)))
+
+    @staticmethod
+    def free_keys(free):
+        keys = []
+        while free:
+            bit = free & -free
+            keys.append(bit.bit_length())
+            free ^= bit
+
+        return keys
+
+    def best_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: (child.score / child.visits +
+                                      exploration * math.sqrt(
+                                          log_visits / child.visits)))
+
+
+class TreeSearch:
+    EXPLORATION = math.sqrt(2)
+
+    def __init__(self, size, run, player_bits, opponent_bits, rng):
+        self.full_mask = (1 << (size * size)) - 1
+        self.masks = masks_through(size, run)
+        self.rng = rng
+        self.root = Node(None, None, player_bits, opponent_bits,
+                         self.full_mask, False)
+
+    def wins_with(self, bits, key):
+        return any(bits & mask == mask for mask in self.masks[key])
+
+    def expand(self, node):
+        key = node.untried.pop(self.rng.randrange(len(node.untried)))
+        mover_bits = node.player_bits | Board.bit_for(key)
+        child = Node(node, key, node.mover_bits, mover_bits, self.full_mask,
+                     self.wins_with(mover_bits, key))
+        node.children.append(child)
+        return child
+
+    def rollout(self, node):
+        # Returns the result for the node's mover.
+        if node.is_terminal:
+            return node.result
+
+        player_bits, mover_bits = node.player_bits, node.mover_bits
+        moves = Node.free_keys(self.full_mask & ~(player_bits | mover_bits))
+        self.rng.shuffle(moves)
+        for turn, key in enumerate(moves):
+            player_bits |= Board.bit_for(key)
+            if self.wins_with(player_bits, key):
+                return 0.0 if turn % 2 == 0 else 1.0
+            player_bits, mover_bits = mover_bits, player_bits
+
+        return 0.5
+
+    def iterate(self):
+        node = self.root
+        while not node.untried and node.children:
+            node = node.best_child(TreeSearch.EXPLORATION)
+
+        if node.untried:
+            node = self.expand(node)
+
+        result = self.rollout(node)
+        while node:
+            node.visits += 1
+            node.score += result
+            result = 1.0 - result
+            node = node.parent
+
+    def run(self, iterations=None, seconds=None):
+        deadline = time.perf_counter() + seconds if seconds else None
+        playouts = 0
+
+        while iterations is None or playouts < iterations:
+            if deadline and playouts % 64 == 0:
+                if time.perf_counter() >= deadline:
+                    break
+            self.iterate()
+            playouts += 1
+
+        return playouts
+
+def search(size, run, player_bits, opponent_bits, iterations, seconds,
+           seed):
+    # Runs one independent tree in a worker process and returns its root
+    # statistics, which the caller merges with the other workers'.
+    tree = TreeSearch(size, run, player_bits, opponent_bits,
+                      random.Random(seed))
+    playouts = tree.run(iterations, seconds)
+    return ({child.move: (child.visits, child.score)
+             for child in tree.root.children}, playouts)
+
+
+class MCTSPlayer:
+    def __init__(self, iterations=None, seconds=1.0, workers=None,
+                 seed=None):
+        self.iterations = iterations
+        self.seconds = seconds
+        self.workers = workers or os.cpu_count()
+        self.rng = random.Random(seed)
+        self.pool = None
+        self.playouts = 0
+        self.search_seconds = 0.0
+        self.last_move_stats = None
+
+    def choose(self, board, marker, opponent_marker):
+        if self.pool is None and self.workers > 1:
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+        # With an iteration budget, it is shared between the workers.
+        iterations = (None if self.iterations is None
+                      else max(1, self.iterations // self.workers))
+        args = (board.size, board.run, board.bits_for(marker),
+                board.bits_for(opponent_marker), iterations, self.seconds)
+        start = time.perf_counter()
+
+        if self.pool:
+            futures = [self.pool.submit(search, *args,
+                                        self.rng.randrange(2 ** 32))
+                       for _ in range(self.workers)]
+            results = [future.result() for future in futures]
+        else:
+            results = [search(*args, self.rng.randrange(2 ** 32))]
+
+        elapsed = time.perf_counter() - start
+        merged = {}
+        playouts = 0
+        for children, worker_playouts in results:
+            playouts += worker_playouts
+            for move, (visits, score) in children.items():
+                total_visits, total_score = merged.get(move, (0, 0.0))
+                merged[move] = (total_visits + visits, total_score + score)
+
+        self.playouts += playouts
+        self.search_seconds += elapsed
+        self.last_move_stats = (playouts, elapsed)
+        return max(merged, key=lambda move: merged[move][0])
+
+    def playouts_per_second(self):
+        if not self.search_seconds:
+            return 0.0
+
+        return self.playouts / self.search_seconds
+
+    def report(self):
+        return (f"MCTS: {self.playouts:,} playouts in "
+                f"{self.search_seconds:.2f}s on {self.workers} worker(s) "
+                f"({self.playouts_per_second():,.0f} playouts/s)")
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Play Tic Tac Toe against Monte Carlo tree search.')
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--run', type=int, default=3)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    parser.add_argument('--iterations', type=int)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    player = MCTSPlayer(args.iterations, args.seconds, args.workers)
+    game = TTTGame(strategy=player, size=args.size, run=args.run)
+    try:
+        game.play()
+    finally:
+        player.close()
+        print(player.report())
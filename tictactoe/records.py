@@ -0,0 +1,151 @@
+import argparse
+import collections
+import os
+
+from tictactoe import Square
+
+
+# Every record is a two-byte header followed by the moves, one square index
+# (key - 1) per four bits, two moves to a byte:
+#   byte 0: result in bits 0-1, move count in bits 2-5
+#   byte 1: first player's strategy id in bits 0-3, second's in bits 4-7
+# The first player is always X, so records can simply be appended.
+TIE = 0
+FIRST_WINS = 1
+SECOND_WINS = 2
+RESULTS = {TIE: 'tie', FIRST_WINS: 'first', SECOND_WINS: 'second'}
+
+STRATEGY_IDS = {
+    'human': 0,
+    'heuristic': 1,
+    'random': 2,
+    'minimax': 3,
+    'tablebase': 4,
+    'mcts': 5,
+}
+STRATEGY_NAMES = {number: name for name, number in STRATEGY_IDS.items()}
+
+
+class GameRecord:
+    def __init__(self, result, first, second, moves):
+        self.result = result
+        self.first = first
+        self.second = second
+        self.moves = moves
+
+    def pack(self):
+        header = bytes((self.result | len(self.moves) << 2,
+                        STRATEGY_IDS[self.first] |
+                        STRATEGY_IDS[self.second] << 4))
+        moves = bytearray((len(self.moves) + 1) // 2)
+        for index, key in enumerate(self.moves):
+            moves[index // 2] |= (key - 1) << (4 * (index % 2))
+
+        return header + moves
+
+    @staticmethod
+    def from_board(board, first, second):
+        # Four bits per move and per move count only fit the 3x3 board.
+        if (board.size, board.run) != (3, 3):
+            raise ValueError('game records only hold 3x3 games')
+
+        if board.is_winner(Square.HUMAN_MARKER):
+            result = FIRST_WINS
+        elif board.is_winner(Square.COMPUTER_MARKER):
+            result = SECOND_WINS
+        else:
+            result = TIE
+
+        return GameRecord(result, first, second, list(board.moves))
+
+class GameRecorder:
+    def __init__(self, path, first='human', second='heuristic'):
+        self.path = path
+        self.first = first
+        self.second = second
+
+    def record(self, board):
+        record = GameRecord.from_board(board, self.first, self.second)
+        with open(self.path, 'ab') as file:
+            file.write(record.pack())
+
+
+def read_records(path, chunk_size=1 << 16):
+    # Yields records one at a time, reading the file in fixed-size chunks.
+    with open(path, 'rb') as file:
+        buffer = b''
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+
+            buffer += chunk
+            offset = 0
+            while offset + 2 <= len(buffer):
+                count = buffer[offset] >> 2
+                end = offset + 2 + (count + 1) // 2
+                if end > len(buffer):
+                    break
+
+                yield unpack(buffer, offset, count)
+                offset = end
+            buffer = buffer[offset:]
+
+def unpack(buffer, offset, count):
+    header, strategies = buffer[offset], buffer[offset + 1]
+    moves = [(buffer[offset + 2 + index // 2] >> (4 * (index % 2)) & 0x0F) + 1
+             for index in range(count)]
+    return GameRecord(header & 0x03, STRATEGY_NAMES[strategies & 0x0F],
+                      STRATEGY_NAMES[strategies >> 4], moves)
+
+
+class ReplayAnalyzer:
+    def __init__(self):
+        self.games = 0
+        self.openings = collections.Counter()
+        self.results_by_first_move = collections.defaultdict(
+            collections.Counter)
+
+    def add(self, record):
+        self.games += 1
+        if record.moves:
+            opening = tuple(record.moves[:2])
+            self.openings[opening] += 1
+            self.results_by_first_move[record.moves[0]][record.result] += 1
+
+    def analyze(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def report(self, top=10):
+        lines = [f"{self.games:,} games",
+                 "Most common openings (first two moves):"]
+        for opening, count in self.openings.most_common(top):
+            moves = ', '.join(str(key) for key in opening)
+            lines.append(f"  {moves:<8}{count:>12,}{count / self.games:>9.1%}")
+
+        lines.append("Results by first move (first player win/tie/loss):")
+        for key in sorted(self.results_by_first_move):
+            results = self.results_by_first_move[key]
+            games = sum(results.values())
+            lines.append(f"  {key:<8}{games:>12,}"
+                         f"{results[FIRST_WINS] / games:>9.1%}"
+                         f"{results[TIE] / games:>9.1%}"
+                         f"{results[SECOND_WINS] / games:>9.1%}")
+
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Summarize a file of recorded Tic Tac Toe games.')
+    parser.add_argument('path')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"no such file: {args.path}")
+
+    analyzer = ReplayAnalyzer().analyze(read_records(args.path))
+    print(analyzer.report(args.top))
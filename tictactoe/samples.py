@@ -0,0 +1,156 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch import CELL_VALUES
+from selfplay import STRATEGIES
+from tictactoe import Board, Square
+
+
+# One sample is 11 int8s: the board before the move (batch.py's cell
+# values, square `key` in column `key - 1`), the square index played
+# (key - 1), and the final outcome for the player who moved: 1, 0 or -1.
+SAMPLE = struct.Struct('9bbb')
+BOARD_COLUMNS = slice(0, 9)
+MOVE_COLUMN = 9
+OUTCOME_COLUMN = 10
+
+
+def board_cells(board):
+    cells = [0] * len(Board.KEYS)
+    for marker, value in CELL_VALUES.items():
+        bits = board.bits_for(marker)
+        for key in Board.KEYS:
+            if bits & Board.bit_for(key):
+                cells[key - 1] = value
+
+    return cells
+
+def fill_region(name, start, count, first_name, second_name, seed):
+    # Runs in a worker process. Plays games until rows [start, start +
+    # count) of the shared buffer are written, then returns. Only the
+    # buffer's name crosses the process boundary, never the samples.
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        rng = random.Random(seed)
+        seats = ((Square.HUMAN_MARKER, Square.COMPUTER_MARKER,
+                  STRATEGIES[first_name](rng)),
+                 (Square.COMPUTER_MARKER, Square.HUMAN_MARKER,
+                  STRATEGIES[second_name](rng)))
+        board = Board()
+        row = start
+        end = start + count
+
+        while row < end:
+            board.reset()
+            game = []
+            turn = 0
+            while not board.is_game_over():
+                marker, opponent_marker, strategy = seats[turn]
+                key = strategy.choose(board, marker, opponent_marker)
+                game.append((board_cells(board), key - 1, marker))
+                board.mark_square_at(key, marker)
+                turn ^= 1
+
+            for cells, move, marker in game[:end - row]:
+                if board.is_winner(marker):
+                    outcome = 1
+                elif board.winner is None:
+                    outcome = 0
+                else:
+                    outcome = -1
+                SAMPLE.pack_into(shared.buf, row * SAMPLE.size,
+                                 *cells, move, outcome)
+                row += 1
+    finally:
+        shared.close()
+
+    return count
+
+
+class SampleBuffer:
+    # Owns the shared memory block. `boards`, `moves` and `outcomes` are
+    # NumPy views straight onto it, so they are only valid until close().
+    def __init__(self, shared, samples):
+        self.shared = shared
+        self.samples = samples
+        self.data = np.ndarray((samples, SAMPLE.size), dtype=np.int8,
+                               buffer=shared.buf)
+        self.boards = self.data[:, BOARD_COLUMNS]
+        self.moves = self.data[:, MOVE_COLUMN]
+        self.outcomes = self.data[:, OUTCOME_COLUMN]
+
+    def close(self):
+        del self.data, self.boards, self.moves, self.outcomes
+        self.shared.close()
+        self.shared.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SampleGenerator:
+    REGION_SIZE = 100_000
+
+    def __init__(self, samples, first='heuristic', second='heuristic',
+                 seed=0, workers=None):
+        self.samples = samples
+        self.first = first
+        self.second = second
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+
+    def regions(self):
+        # Fixed regions with their own seeds, so the samples do not depend
+        # on the number of workers.
+        for index, start in enumerate(range(0, self.samples,
+                                            SampleGenerator.REGION_SIZE)):
+            count = min(SampleGenerator.REGION_SIZE, self.samples - start)
+            yield start, count, self.seed + index
+
+    def generate(self):
+        shared = shared_memory.SharedMemory(
+            create=True, size=max(1, self.samples * SAMPLE.size))
+        try:
+            with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(fill_region, shared.name, start,
+                                       count, self.first, self.second, seed)
+                           for start, count, seed in self.regions()]
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+        except BaseException:
+            shared.close()
+            shared.unlink()
+            raise
+
+        return SampleBuffer(shared, self.samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate (board, move, outcome) samples by self-play.')
+    parser.add_argument('samples', type=int)
+    parser.add_argument('--first', choices=STRATEGIES, default='heuristic')
+    parser.add_argument('--second', choices=STRATEGIES, default='heuristic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generator = SampleGenerator(args.samples, args.first, args.second,
+                                args.seed, args.workers)
+    with generator.generate() as buffer:
+        elapsed = time.perf_counter() - start
+        print(f"{buffer.samples:,} samples in {elapsed:.2f}s "
+              f"({buffer.samples / elapsed:,.0f} samples/s)")
+        print(f"outcomes: {np.bincount(buffer.outcomes + 1, minlength=3)} "
+              f"(loss, draw, win)")
@@ -0,0 +1,183 @@
+import argparse
+import collections
+import concurrent.futures
+import os
+import random
+import time
+
+from tictactoe import Board, HeuristicStrategy, RandomStrategy, Square
+from mcts import MCTSPlayer
+from records import GameRecord
+from solver import MinimaxSolver
+from tablebase import Tablebase
+
+
+STRATEGIES = {
+    'heuristic': HeuristicStrategy,
+    'random': RandomStrategy,
+    'minimax': lambda rng: MinimaxSolver(),
+    'tablebase': lambda rng: Tablebase(),
+    'mcts': lambda rng: MCTSPlayer(iterations=1000, workers=1,
+                                   seed=rng.randrange(2 ** 32)),
+}
+
+# Bump a strategy's version whenever the way it plays changes, so that
+# cached tournament results for it are played again.
+STRATEGY_VERSIONS = {
+    'heuristic': 1,
+    'random': 1,
+    'minimax': 1,
+    'tablebase': 1,
+    'mcts': 1,
+}
+
+
+def play_game(first, second, board):
+    # Returns 0 if `first` wins, 1 if `second` wins and None for a tie.
+    seats = ((Square.HUMAN_MARKER, Square.COMPUTER_MARKER, first),
+             (Square.COMPUTER_MARKER, Square.HUMAN_MARKER, second))
+    board.reset()
+    turn = 0
+
+    while True:
+        marker, opponent_marker, strategy = seats[turn]
+        board.mark_square_at(strategy.choose(board, marker, opponent_marker),
+                             marker)
+        if board.is_winner(marker):
+            return turn
+        if board.is_full():
+            return None
+        turn ^= 1
+
+def play_batch(first_name, second_name, games, seed, size=3, run=3,
+               record=False):
+    # Runs in a worker process, so it takes strategy names, not objects.
+    # With `record`, it also returns the games packed as GameRecords.
+    rng = random.Random(seed)
+    first = STRATEGIES[first_name](rng)
+    second = STRATEGIES[second_name](rng)
+    board = Board(size, run)
+    tally = collections.Counter()
+    records = bytearray()
+
+    for game in range(games):
+        if game % 2 == 0:
+            winner = play_game(first, second, board)
+            seat = 'first'
+            seated = (first_name, second_name)
+        else:
+            winner = play_game(second, first, board)
+            winner = None if winner is None else 1 - winner
+            seat = 'second'
+            seated = (second_name, first_name)
+
+        if record:
+            records += GameRecord.from_board(board, *seated).pack()
+
+        if winner is None:
+            tally[(seat, 'draw')] += 1
+        elif winner == 0:
+            tally[(seat, 'win')] += 1
+        else:
+            tally[(seat, 'loss')] += 1
+
+    return tally, bytes(records)
+
+
+class SelfPlay:
+    BATCH_SIZE = 10_000
+
+    def __init__(self, first, second, games, seed=0, workers=None,
+                 size=3, run=3, record_path=None):
+        self.first = first
+        self.second = second
+        self.games = games
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+        self.size = size
+        self.run = run
+        self.record_path = record_path
+
+    def batches(self):
+        # Each batch gets its own seed, so results do not depend on which
+        # worker happens to pick it up.
+        for index, start in enumerate(range(0, self.games,
+                                            SelfPlay.BATCH_SIZE)):
+            games = min(SelfPlay.BATCH_SIZE, self.games - start)
+            yield games, self.seed + index
+
+    def play(self):
+        tally = collections.Counter()
+        start = time.perf_counter()
+
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(play_batch, self.first, self.second,
+                                   games, seed, self.size, self.run,
+                                   self.record_path is not None)
+                       for games, seed in self.batches()]
+            for future in concurrent.futures.as_completed(futures):
+                batch_tally, records = future.result()
+                tally.update(batch_tally)
+                if records:
+                    with open(self.record_path, 'ab') as file:
+                        file.write(records)
+
+        return SelfPlayResults(self.first, self.second, tally,
+                               time.perf_counter() - start)
+
+class SelfPlayResults:
+    OUTCOMES = ('win', 'draw', 'loss')
+
+    def __init__(self, first, second, tally, seconds):
+        self.first = first
+        self.second = second
+        self.tally = tally
+        self.seconds = seconds
+
+    @property
+    def games(self):
+        return sum(self.tally.values())
+
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def count(self, outcome, seat=None):
+        seats = ('first', 'second') if seat is None else (seat,)
+        return sum(self.tally[(seat, outcome)] for seat in seats)
+
+    def table(self):
+        lines = [f"{self.first} vs {self.second} "
+                 f"(win/draw/loss for {self.first})",
+                 f"{'':<16}{'win':>10}{'draw':>10}{'loss':>10}"]
+        for label, seat in ((f"{self.first} first", 'first'),
+                            (f"{self.second} first", 'second'),
+                            ('total', None)):
+            counts = ''.join(f"{self.count(outcome, seat):>10}"
+                             for outcome in SelfPlayResults.OUTCOMES)
+            lines.append(f"{label:<16}{counts}")
+
+        lines.append(f"{self.games} games in {self.seconds:.2f}s "
+                     f"({self.games_per_second():,.0f} games/s)")
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Play tictactoe strategies against each other.')
+    parser.add_argument('first', choices=STRATEGIES)
+    parser.add_argument('second', choices=STRATEGIES)
+    parser.add_argument('--games', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--run', type=int, default=3)
+    parser.add_argument('--record', metavar='PATH',
+                        help='append every game to a game-record file')
+    args = parser.parse_args()
+
+    if args.record and (args.size, args.run) != (3, 3):
+        parser.error('game records only hold 3x3 games')
+
+    self_play = SelfPlay(args.first, args.second, args.games, args.seed,
+                         args.workers, args.size, args.run, args.record)
+    print(self_play.play().table())
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import re
+import statistics
+import time
+
+from tictactoe import BoardRenderer, TTTGame
+
+
+class GameSession(TTTGame):
+    # One connection's game. TTTGame's display methods print, so their
+    # output is captured and sent to this session's socket instead. Nothing
+    # awaits while stdout is redirected, so sessions never see each other's
+    # output.
+    def __init__(self, reader, writer, diff=False):
+        super().__init__(renderer=BoardRenderer(self, diff))
+        self.reader = reader
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode())
+
+    def send(self, method, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = method(*args)
+
+        self.writer.write(output.getvalue().encode())
+        return result
+
+    async def ask(self, prompt):
+        self.writer.write(prompt.encode())
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionResetError('player disconnected')
+
+        return line.decode(errors='replace').strip()
+
+    async def serve(self):
+        self.send(self.display_welcome_message)
+
+        while True:
+            await self.serve_one_game()
+            if not await self.serve_play_again():
+                break
+
+        self.send(self.display_goodbye_message)
+        await self.writer.drain()
+
+    async def serve_one_game(self):
+        self.board.reset()
+        self.renderer.draw(self.board)
+
+        while True:
+            await self.serve_human_move()
+            if self.is_game_over():
+                break
+
+            self.computer_moves()
+            if self.is_game_over():
+                break
+
+            self.renderer.draw(self.board)
+
+        self.renderer.draw(self.board)
+        self.send(self.display_results)
+
+    async def serve_human_move(self):
+        while True:
+            choice = self.valid_square(await self.ask(self.square_prompt()))
+            if choice:
+                break
+
+            self.writer.write(b"Sorry, that's not a valid choice.\n\n")
+
+        self.board.mark_square_at(choice, self.human.marker)
+
+    async def serve_play_again(self):
+        self.writer.write(b'Do you want to play again?\n')
+        response = await self.ask("Enter y/n: ")
+
+        while not response.lower().startswith(('y', 'n')):
+            self.writer.write(b'Invalid input. Do you want to play again?\n')
+            response = await self.ask("Enter y/n: ")
+
+        return response.lower().startswith('y')
+
+
+class GameServer:
+    def __init__(self, host='127.0.0.1', port=8765, diff=False):
+        self.host = host
+        self.port = port
+        self.diff = diff
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.finished_sessions = 0
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+
+        try:
+            await GameSession(reader, writer, self.diff).serve()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            self.finished_sessions += 1
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host,
+                                            self.port, backlog=4096)
+        print(f"Serving Tic Tac Toe on {self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            print(self.report())
+
+    def report(self):
+        return (f"{self.finished_sessions} sessions finished, "
+                f"peak of {self.peak_sessions} at once")
+
+
+class LoadGenerator:
+    # Simulated players pick random squares. Latency is the time from
+    # sending a move to receiving the next prompt, so it includes the
+    # computer's reply and the board being written back.
+    def __init__(self, players, games, host='127.0.0.1', port=8765, seed=0):
+        self.players = players
+        self.games = games
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.latencies = []
+
+    async def play(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        games_left = self.games
+
+        try:
+            prompt = (await reader.readuntil(b': ')).decode()
+            while True:
+                is_move = not prompt.endswith("Enter y/n: ")
+                if is_move:
+                    choices = re.findall(r'\d+', prompt[prompt.rindex('('):])
+                    answer = self.rng.choice(choices)
+                else:
+                    games_left -= 1
+                    answer = 'y' if games_left else 'n'
+
+                writer.write(f"{answer}\n".encode())
+                start = time.perf_counter()
+                await writer.drain()
+                if not games_left:
+                    break
+
+                prompt = (await reader.readuntil(b': ')).decode()
+                if is_move:
+                    self.latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    async def run(self):
+        start = time.perf_counter()
+        await asyncio.gather(*(self.play() for _ in range(self.players)))
+        return LoadReport(self.players, self.latencies,
+                          time.perf_counter() - start)
+
+class LoadReport:
+    def __init__(self, players, latencies, seconds):
+        self.players = players
+        self.latencies = latencies
+        self.seconds = seconds
+
+    def __str__(self):
+        latencies = sorted(self.latencies)
+        milliseconds = statistics.quantiles(latencies, n=100)
+        return (f"{self.players} concurrent players, {len(latencies)} moves "
+                f"in {self.seconds:.2f}s "
+                f"({len(latencies) / self.seconds:,.0f} moves/s)\n"
+                f"move latency: mean {statistics.mean(latencies) * 1000:.2f}ms"
+                f", p50 {milliseconds[49] * 1000:.2f}ms"
+                f", p99 {milliseconds[98] * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tic Tac Toe over TCP.')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--diff', action='store_true',
+                        help='redraw only changed squares (ANSI terminals)')
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        try:
+            asyncio.run(GameServer(args.host, args.port, args.diff).serve())
+        except KeyboardInterrupt:
+            pass
+    else:
+        load = LoadGenerator(args.players, args.games, args.host, args.port)
+        print(asyncio.run(load.run()))
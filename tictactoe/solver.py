@@ -0,0 +1,137 @@
+import math
+
+from tictactoe import Board, TTTGame
+
+
+class Symmetry:
+    # The eight symmetries of the 3x3 board, as the key each square moves to.
+    PERMUTATIONS = (
+        (1, 2, 3, 4, 5, 6, 7, 8, 9),  # identity
+        (7, 4, 1, 8, 5, 2, 9, 6, 3),  # rotate 90
+        (9, 8, 7, 6, 5, 4, 3, 2, 1),  # rotate 180
+        (3, 6, 9, 2, 5, 8, 1, 4, 7),  # rotate 270
+        (3, 2, 1, 6, 5, 4, 9, 8, 7),  # mirror left-right
+        (7, 8, 9, 4, 5, 6, 1, 2, 3),  # mirror top-bottom
+        (1, 4, 7, 2, 5, 8, 3, 6, 9),  # main diagonal
+        (9, 6, 3, 8, 5, 2, 7, 4, 1),  # anti-diagonal
+    )
+
+    @staticmethod
+    def transform(bits, permutation):
+        result = 0
+        for key, target in zip(Board.KEYS, permutation):
+            if bits & Board.bit_for(key):
+                result |= Board.bit_for(target)
+
+        return result
+
+    @staticmethod
+    def canonical(player_bits, opponent_bits):
+        shift = len(Board.KEYS)
+        return min((table[player_bits] << shift) | table[opponent_bits]
+                   for table in Symmetry.TABLES)
+
+Symmetry.TABLES = tuple(
+    tuple(Symmetry.transform(bits, permutation)
+          for bits in range(Board.FULL_MASK + 1))
+    for permutation in Symmetry.PERMUTATIONS)
+
+
+class MinimaxSolver:
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    # Search the center, then corners, then edges to cut off sooner.
+    MOVE_ORDER = (5, 1, 3, 7, 9, 2, 4, 6, 8)
+
+    def __init__(self):
+        self.table = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def choose(self, board, marker, opponent_marker):
+        if board.keys != Board.KEYS or board.run != 3:
+            raise ValueError(f"{self.__class__.__name__} only plays on the "
+                             "3x3 board")
+
+        return self.choose_from_bits(board.bits_for(marker),
+                                     board.bits_for(opponent_marker))
+
+    def choose_from_bits(self, player_bits, opponent_bits):
+        best_key = None
+        best_score = -math.inf
+
+        for key in self.ordered_moves(player_bits | opponent_bits):
+            score = -self.negamax(opponent_bits,
+                                  player_bits | Board.bit_for(key),
+                                  -math.inf, math.inf)
+            if score > best_score:
+                best_key, best_score = key, score
+
+        return best_key
+
+    def ordered_moves(self, occupied):
+        return [key for key in MinimaxSolver.MOVE_ORDER
+                if not occupied & Board.bit_for(key)]
+
+    def negamax(self, player_bits, opponent_bits, alpha, beta):
+        # Scores are from the point of view of the player to move. Quicker
+        # wins score higher, so the solver finishes games it can win.
+        occupied = player_bits | opponent_bits
+        if Board.WINNING_BITBOARDS[opponent_bits]:
+            return -(1 + len(Board.UNUSED_KEYS[occupied]))
+        if occupied == Board.FULL_MASK:
+            return 0
+
+        position = Symmetry.canonical(player_bits, opponent_bits)
+        self.lookups += 1
+        entry = self.table.get(position)
+        if entry:
+            self.hits += 1
+            score, flag = entry
+            if flag == MinimaxSolver.EXACT:
+                return score
+            if flag == MinimaxSolver.LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        original_alpha = alpha
+        best_score = -math.inf
+
+        for key in self.ordered_moves(occupied):
+            score = -self.negamax(opponent_bits,
+                                  player_bits | Board.bit_for(key),
+                                  -beta, -alpha)
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = MinimaxSolver.UPPER
+        elif best_score >= beta:
+            flag = MinimaxSolver.LOWER
+        else:
+            flag = MinimaxSolver.EXACT
+
+        self.table[position] = (best_score, flag)
+        return best_score
+
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def cache_report(self):
+        return (f"Solver cache: {len(self.table)} positions, "
+                f"{self.hits}/{self.lookups} lookups hit "
+                f"({self.hit_rate():.1%})")
+
+
+if __name__ == '__main__':
+    solver = MinimaxSolver()
+    game = TTTGame(strategy=solver)
+    game.play()
+    print(solver.cache_report())
@@ -0,0 +1,107 @@
+import math
+import mmap
+import os
+import sys
+import time
+
+from tictactoe import Board, TTTGame
+from solver import MinimaxSolver
+
+
+class Tablebase:
+    PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tictactoe.tablebase')
+
+    # Each entry is one byte: the best move's key in the low four bits and
+    # the outcome for the player to move in the two bits above them.
+    # Unreachable states are left as zero.
+    MOVE_MASK = 0x0F
+    OUTCOME_SHIFT = 4
+    WIN = 1
+    DRAW = 2
+    LOSS = 3
+
+    # Squares are base-3 digits from the point of view of the player to
+    # move: 0 is empty, 1 is theirs and 2 is their opponent's.
+    SIZE = 3 ** len(Board.KEYS)
+    TERNARY = tuple(sum(3 ** (key - 1)
+                        for key in Board.KEYS if bits & Board.bit_for(key))
+                    for bits in range(Board.FULL_MASK + 1))
+
+    def __init__(self, path=PATH):
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def index(player_bits, opponent_bits):
+        return (Tablebase.TERNARY[player_bits] +
+                2 * Tablebase.TERNARY[opponent_bits])
+
+    def lookup(self, player_bits, opponent_bits):
+        entry = self.data[Tablebase.index(player_bits, opponent_bits)]
+        return entry & Tablebase.MOVE_MASK, entry >> Tablebase.OUTCOME_SHIFT
+
+    def choose(self, board, marker, opponent_marker):
+        if board.keys != Board.KEYS or board.run != 3:
+            raise ValueError(f"{self.__class__.__name__} only plays on the "
+                             "3x3 board")
+
+        key, _ = self.lookup(board.bits_for(marker),
+                             board.bits_for(opponent_marker))
+        return key
+
+    def close(self):
+        self.data.close()
+
+    @staticmethod
+    def build(path=PATH):
+        entries = bytearray(Tablebase.SIZE)
+        solver = MinimaxSolver()
+        Tablebase.fill(entries, solver, 0, 0)
+
+        with open(path, 'wb') as file:
+            file.write(entries)
+
+        return sum(1 for entry in entries if entry)
+
+    @staticmethod
+    def fill(entries, solver, player_bits, opponent_bits):
+        index = Tablebase.index(player_bits, opponent_bits)
+        if entries[index]:
+            return
+
+        occupied = player_bits | opponent_bits
+        if Board.WINNING_BITBOARDS[opponent_bits]:
+            entries[index] = Tablebase.LOSS << Tablebase.OUTCOME_SHIFT
+            return
+        if occupied == Board.FULL_MASK:
+            entries[index] = Tablebase.DRAW << Tablebase.OUTCOME_SHIFT
+            return
+
+        key = solver.choose_from_bits(player_bits, opponent_bits)
+        score = -solver.negamax(opponent_bits,
+                                player_bits | Board.bit_for(key),
+                                -math.inf, math.inf)
+        if score > 0:
+            outcome = Tablebase.WIN
+        elif score < 0:
+            outcome = Tablebase.LOSS
+        else:
+            outcome = Tablebase.DRAW
+        entries[index] = key | outcome << Tablebase.OUTCOME_SHIFT
+
+        for key in Board.UNUSED_KEYS[occupied]:
+            Tablebase.fill(entries, solver, opponent_bits,
+                           player_bits | Board.bit_for(key))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['build']:
+        start = time.perf_counter()
+        count = Tablebase.build()
+        elapsed = time.perf_counter() - start
+        print(f"Wrote {count} positions ({Tablebase.SIZE} bytes) to "
+              f"{Tablebase.PATH} in {elapsed:.2f}s")
+    else:
+        game = TTTGame(strategy=Tablebase())
+        game.play()
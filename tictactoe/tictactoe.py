@@ -1,5 +1,8 @@
+import collections
+import functools
 import os
 import random
+import sys
 
 
 class Square:
@@ -24,51 +27,408 @@ class Square:
     def __str__(self):
         return self.marker
 
+class BoardSquare(Square):
+    # One of Board.squares. Reading or setting its marker goes straight to
+    # the board's bitboards.
+    def __init__(self, board, key):
+        self.board = board
+        self.key = key
+
+    @property
+    def marker(self):
+        return self.board.marker_at(self.key)
+
+    @marker.setter
+    def marker(self, marker):
+        self.board.mark_square_at(self.key, marker)
+
 class Board:
-    def __init__(self):
-        self.squares = {key: Square() for key in range(1, 10)}
+    # The classic 3x3 board. Its rows and lookup tables are shared by the
+    # 3x3 solvers; other sizes build their rows in `geometry`.
+    WINNING_ROWS = (
+        (1, 2, 3),  # top row of board
+        (4, 5, 6),  # center row of board
+        (7, 8, 9),  # bottom row of board
+        (1, 4, 7),  # left column of board
+        (2, 5, 8),  # middle column of board
+        (3, 6, 9),  # right column of board
+        (1, 5, 9),  # diagonal: top-left to bottom-right
+        (3, 5, 7),  # diagonal: top-right to bottom-left
+    )
+
+    # Square `key` is stored in bit `key - 1` of each player's bitboard.
+    KEYS = tuple(range(1, 10))
+    FULL_MASK = (1 << len(KEYS)) - 1
+
+    OPPONENTS = {Square.HUMAN_MARKER: Square.COMPUTER_MARKER,
+                 Square.COMPUTER_MARKER: Square.HUMAN_MARKER}
+
+    # Right, down, down-right and down-left: the four lines through a square.
+    DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+    @staticmethod
+    def bit_for(key):
+        return 1 << (key - 1)
+
+    @staticmethod
+    def mask_for(keys):
+        mask = 0
+        for key in keys:
+            mask |= Board.bit_for(key)
+        return mask
+
+    def __init__(self, size=3, run=3):
+        self.size = size
+        self.run = run
+        self.keys = tuple(range(1, size * size + 1))
+        self.full_mask = (1 << len(self.keys)) - 1
+        (self.winning_rows,
+         self.row_indexes,
+         self.rows_through) = Board.geometry(size, run)
+        (self.row_masks,
+         self.masks_through,
+         self.threats) = Board.masks(size, run)
+        self.count_width = run.bit_length()
+        self.count_steps = Board.count_steps(size, run)
+        self.reset()
+
+    @property
+    def squares(self):
+        return {key: BoardSquare(self, key) for key in self.keys}
+
+    def marker_at(self, key):
+        bit = Board.bit_for(key)
+        for marker, bits in self.bits.items():
+            if bits & bit:
+                return marker
+
+        return Square.INITIAL_MARKER
+
+    def bits_for(self, marker):
+        return self.bits.get(marker, 0)
+
+    def occupied(self):
+        return self.taken
 
     def count_markers_for(self, player, keys):
-        markers = [self.squares[key].marker for key in keys]
-        return markers.count(player.marker)
-    
+        # Each player's row counts are packed into one int, `count_width`
+        # bits per row in row order.
+        index = self.row_indexes.get(tuple(keys))
+        if index is not None and player.marker in self.counts:
+            counts = self.counts[player.marker] >> (index * self.count_width)
+            return counts & ((1 << self.count_width) - 1)
+
+        markers = self.bits_for(player.marker) & Board.mask_for(keys)
+        return markers.bit_count()
+
+    def center_key(self):
+        if self.size % 2 == 0:
+            return None
+
+        return (len(self.keys) + 1) // 2
+
+    def render(self):
+        squares = self.squares
+        spacer = "|".join(["     "] * self.size).rstrip()
+        divider = "+".join(["-----"] * self.size)
+
+        lines = [""]
+        for row_start in range(1, len(self.keys) + 1, self.size):
+            if row_start > 1:
+                lines.append(divider)
+            lines.append(spacer)
+            keys = range(row_start, row_start + self.size)
+            lines.append("|".join(f"  {squares[key]}  "
+                                  for key in keys)[:-2])
+            lines.append(spacer)
+        lines.append("")
+
+        return "\n".join(lines) + "\n"
+
     def display(self):
-        print()
-        print("     |     |")
-        print(f"  {self.squares[1]}  |"
-              f"  {self.squares[2]}  |"
-              f"  {self.squares[3]}")
-        print("     |     |")
-        print("-----+-----+-----")
-        print("     |     |")
-        print(f"  {self.squares[4]}  |"
-              f"  {self.squares[5]}  |"
-              f"  {self.squares[6]}")
-        print("     |     |")
-        print("-----+-----+-----")
-        print("     |     |")
-        print(f"  {self.squares[7]}  |"
-              f"  {self.squares[8]}  |"
-              f"  {self.squares[9]}")
-        print("     |     |")
-        print()
+        sys.stdout.write(self.render())
 
     def is_full(self):
-        return len(self.unused_squares()) == 0
-    
+        return self.occupied() == self.full_mask
+
+    def is_winner(self, marker):
+        return self.winner == marker
+
+    def is_game_over(self):
+        return self.winner is not None or self.is_full()
+
     def mark_square_at(self, key, marker):
-        self.squares[key].marker = marker
+        bit = 1 << (key - 1)
+        if self.taken & bit or marker == Square.INITIAL_MARKER:
+            self.replace_square_at(key, marker, bit)
+            return
+
+        # Marking an empty square, the only move a game makes: one add
+        # bumps the counts of every row through it, and only those rows can
+        # have been completed.
+        marked = self.bits[marker] | bit
+        self.bits[marker] = marked
+        self.taken |= bit
+        self.counts[marker] += self.count_steps[key]
+        self.moves.append(key)
+
+        if self.winner is None:
+            if self.size == 3:
+                if Board.WINNING_BITBOARDS[marked]:
+                    self.winner = marker
+            else:
+                for mask in self.masks_through[key]:
+                    if marked & mask == mask:
+                        self.winner = marker
+                        break
+
+    def replace_square_at(self, key, marker, bit):
+        # Clearing or overwriting a square is rare, so the winner is found
+        # again from scratch.
+        previous = self.marker_at(key)
+        if previous != Square.INITIAL_MARKER:
+            self.bits[previous] &= ~bit
+            self.counts[previous] -= self.count_steps[key]
+            self.moves.remove(key)
+
+        if marker != Square.INITIAL_MARKER:
+            self.bits[marker] |= bit
+            self.counts[marker] += self.count_steps[key]
+            self.moves.append(key)
+
+        self.taken = (self.bits[Square.HUMAN_MARKER] |
+                      self.bits[Square.COMPUTER_MARKER])
+        self.winner = self.find_winner()
+
+    def find_winner(self):
+        for marker, bits in self.bits.items():
+            for mask in self.row_masks:
+                if bits & mask == mask:
+                    return marker
+
+        return None
 
     def reset(self):
-        self.squares = {key: Square() for key in range(1, 10)}
+        self.bits = {Square.HUMAN_MARKER: 0, Square.COMPUTER_MARKER: 0}
+        self.counts = {Square.HUMAN_MARKER: 0, Square.COMPUTER_MARKER: 0}
+        self.taken = 0
+        self.winner = None
+        self.moves = []
 
     def unused_squares(self):
-        return [key
-                for key, square in self.squares.items()
-                if square.is_unused()]
-    
+        occupied = self.occupied()
+        if self.size == 3:
+            return list(Board.UNUSED_KEYS[occupied])
+
+        unused = []
+        free = self.full_mask & ~occupied
+        while free:
+            bit = free & -free
+            unused.append(bit.bit_length())
+            free ^= bit
+
+        return unused
+
     def is_unused_square(self, key):
-        return self.squares[key].is_unused()
+        return not self.occupied() & Board.bit_for(key)
+
+    def winning_square(self, marker, rows=None):
+        bits = self.bits_for(marker)
+        empty = ~self.occupied()
+        threats = (self.threats if rows is None
+                   else Board.threats_for(rows))
+
+        for pair, bit, key in threats:
+            if bits & pair == pair and empty & bit:
+                return key
+
+        return None
+
+    @staticmethod
+    def threats_for(rows):
+        # One (other squares mask, last square bit, last square key) entry
+        # for every square of every row, in row order.
+        threats = []
+        for row in rows:
+            row_mask = Board.mask_for(row)
+            for key in row:
+                bit = Board.bit_for(key)
+                threats.append((row_mask & ~bit, bit, key))
+
+        return tuple(threats)
+
+    @staticmethod
+    @functools.cache
+    def geometry(size, run):
+        rows = []
+        for row_step, col_step in Board.DIRECTIONS:
+            for row in range(size):
+                for col in range(size):
+                    end_row = row + row_step * (run - 1)
+                    end_col = col + col_step * (run - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        rows.append(tuple(
+                            (row + row_step * step) * size +
+                            col + col_step * step + 1
+                            for step in range(run)))
+
+        row_indexes = {row: index for index, row in enumerate(rows)}
+        rows_through = {key: [] for key in range(1, size * size + 1)}
+        for index, row in enumerate(rows):
+            for key in row:
+                rows_through[key].append(index)
+
+        return tuple(rows), row_indexes, rows_through
+
+    @staticmethod
+    @functools.cache
+    def masks(size, run):
+        # Each row's mask, the masks of the rows through each square, and
+        # the rows' threat entries, for the bitboard checks.
+        rows, _, rows_through = Board.geometry(size, run)
+        row_masks = tuple(Board.mask_for(row) for row in rows)
+        masks_through = {key: tuple(row_masks[index] for index in indexes)
+                         for key, indexes in rows_through.items()}
+        return row_masks, masks_through, Board.threats_for(rows)
+
+    @staticmethod
+    @functools.cache
+    def count_steps(size, run):
+        # What marking each square adds to a player's packed row counts: a
+        # one in the field of every row through it.
+        _, _, rows_through = Board.geometry(size, run)
+        width = run.bit_length()
+        return {key: sum(1 << (index * width) for index in indexes)
+                for key, indexes in rows_through.items()}
+
+Board.WINNING_MASKS = tuple(Board.mask_for(row) for row in Board.WINNING_ROWS)
+Board.WINNING_BITBOARDS = tuple(
+    any(bits & mask == mask for mask in Board.WINNING_MASKS)
+    for bits in range(Board.FULL_MASK + 1))
+Board.UNUSED_KEYS = tuple(
+    tuple(key for key in Board.KEYS if not occupied & Board.bit_for(key))
+    for occupied in range(Board.FULL_MASK + 1))
+
+class BoardRenderer:
+    # Writes each frame with a single write. In diff mode the board is
+    # drawn once at the top of the screen, and later frames only move the
+    # cursor to the squares that changed, then park it below the board.
+    CLEAR_SCREEN = "\033[H\033[2J"
+    CLEAR_BELOW = "\033[J"
+
+    def __init__(self, stream=None, diff=False):
+        self.stream = stream
+        self.diff = diff
+        self.drawn = None
+
+    def draw(self, board):
+        markers = [board.marker_at(key) for key in board.keys]
+
+        if self.diff and self.drawn and len(self.drawn) == len(markers):
+            frame = self.changes(board, markers)
+        elif self.diff:
+            frame = BoardRenderer.CLEAR_SCREEN + board.render()
+        else:
+            frame = board.render()
+
+        self.drawn = markers
+        (self.stream or sys.stdout).write(frame)
+
+    def changes(self, board, markers):
+        moves = []
+        for index, (old, new) in enumerate(zip(self.drawn, markers)):
+            if old != new:
+                row, col = divmod(index, board.size)
+                # Each board row takes four lines after the leading blank
+                # one, and each square is six columns wide.
+                moves.append(f"\033[{3 + 4 * row};{3 + 6 * col}H{new}")
+
+        moves.append(f"\033[{4 * board.size + 2};1H")
+        moves.append(BoardRenderer.CLEAR_BELOW)
+        return "".join(moves)
+
+class DecisionCache:
+    # Bounded LRU cache of the deterministic part of a move decision, keyed
+    # by the exact position. A stored None means "no forced move", and the
+    # caller still makes its random pick afterwards, so caching never
+    # changes how a game plays out.
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, position, decide):
+        if position in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(position)
+            return self.entries[position]
+
+        self.misses += 1
+        decision = decide()
+        self.entries[position] = decision
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        return decision
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        return (f"Decision cache: {len(self.entries)} positions, "
+                f"{self.hits} hits, {self.misses} misses "
+                f"({self.hit_rate():.1%} hit rate)")
+
+class RandomStrategy:
+    # Without an `rng`, moves come from the random module itself, so
+    # random.seed still fixes them and the strategy can be deep-copied.
+    def __init__(self, rng=None):
+        self.rng = rng
+
+    def choose(self, board, marker, opponent_marker):
+        return (self.rng or random).choice(board.unused_squares())
+
+class HeuristicStrategy(RandomStrategy):
+    # Win, then block, then take the center, then pick at random, for
+    # whichever seat it is playing.
+    def __init__(self, rng=None, decision_cache=None):
+        super().__init__(rng)
+        self.decision_cache = decision_cache or DecisionCache()
+
+    def choose(self, board, marker, opponent_marker):
+        position = (board.size, board.run, board.bits_for(marker),
+                    board.bits_for(opponent_marker))
+        choice = self.decision_cache.lookup(
+            position,
+            lambda: HeuristicStrategy.forced_move(board, marker,
+                                                  opponent_marker))
+
+        if not choice:
+            choice = super().choose(board, marker, opponent_marker)
+
+        return choice
+
+    @staticmethod
+    def forced_move(board, marker, opponent_marker):
+        choice = board.winning_square(marker)
+
+        if not choice:
+            choice = board.winning_square(opponent_marker)
+
+        if not choice:
+            choice = HeuristicStrategy.center_move(board)
+
+        return choice
+
+    @staticmethod
+    def center_move(board):
+        center = board.center_key()
+        if center and board.is_unused_square(center):
+            return center
+
+        return None
 
 class Player:
     def __init__(self, marker):
@@ -92,21 +452,17 @@ class Computer(Player):
         super().__init__(Square.COMPUTER_MARKER)
 
 class TTTGame:
-    POSSIBLE_WINNING_ROWS = (
-        (1, 2, 3),  # top row of board
-        (4, 5, 6),  # center row of board
-        (7, 8, 9),  # bottom row of board
-        (1, 4, 7),  # left column of board
-        (2, 5, 8),  # middle column of board
-        (3, 6, 9),  # right column of board
-        (1, 5, 9),  # diagonal: top-left to bottom-right
-        (3, 5, 7),  # diagonal: top-right to bottom-left
-    )
+    POSSIBLE_WINNING_ROWS = Board.WINNING_ROWS
     
-    def __init__(self):
-        self.board = Board()
+    def __init__(self, strategy=None, size=3, run=3, renderer=None,
+                 recorder=None, decision_cache=None):
+        self.board = Board(size, run)
+        self.renderer = renderer or BoardRenderer()
+        self.recorder = recorder
+        self.heuristic = HeuristicStrategy(decision_cache=decision_cache)
         self.human = Human()
         self.computer = Computer()
+        self.strategy = strategy
 
     def play(self):
         self.display_welcome_message()
@@ -120,7 +476,7 @@ class TTTGame:
 
     def play_one_game(self):
         self.board.reset()
-        self.board.display()
+        self.renderer.draw(self.board)
 
         while True:
             self.human_moves()
@@ -131,11 +487,14 @@ class TTTGame:
             if self.is_game_over():
                 break
 
-            self.board.display()
+            self.renderer.draw(self.board)
 
-        self.board.display()
+        self.renderer.draw(self.board)
         self.display_results()
 
+        if self.recorder:
+            self.recorder.record(self.board)
+
     
     def play_again(self):
         print('Do you want to play again?')
@@ -163,77 +522,68 @@ class TTTGame:
             print("A tie game. How boring.")
 
     def is_winner(self, player):
-        for row in TTTGame.POSSIBLE_WINNING_ROWS:
-            if self.three_in_a_row(player, row):
-                return True
-
-        return False
+        return self.board.is_winner(player.marker)
 
     def human_moves(self):
         while True:
-            valid_choices = self.board.unused_squares()
-            choices_list = [str(choice) for choice in valid_choices]
-            choices_str = TTTGame.join_or(choices_list)
-            prompt = f"Choose a square ({choices_str}): "
-            choice = input(prompt)
-
-            try:
-                choice = int(choice)
-                if choice in valid_choices:
-                    break
-            except ValueError:
-                pass
+            choice = self.valid_square(input(self.square_prompt()))
+            if choice:
+                break
 
             print("Sorry, that's not a valid choice.")
             print()
 
         self.board.mark_square_at(choice, self.human.marker)
 
-    def computer_moves(self):
-        choice = self.offensive_move()
+    def square_prompt(self):
+        choices_list = [str(choice) for choice in self.board.unused_squares()]
+        choices_str = TTTGame.join_or(choices_list)
+        return f"Choose a square ({choices_str}): "
 
-        if not choice:
-            choice = self.defensive_move()
+    def valid_square(self, choice):
+        try:
+            choice = int(choice)
+        except ValueError:
+            return None
 
-        if not choice:
-            choice = self.center_move()
+        return choice if choice in self.board.unused_squares() else None
 
-        if not choice:
-            choice = self.random_move()
+    def computer_moves(self):
+        if self.strategy:
+            choice = self.strategy.choose(self.board,
+                                          self.computer.marker,
+                                          self.human.marker)
+        else:
+            choice = self.heuristic_move()
 
         self.board.mark_square_at(choice, self.computer.marker)
 
-    def offensive_move(self):
-        for row in TTTGame.POSSIBLE_WINNING_ROWS:
-            key = self.winning_square(self.computer, row)
-            if key:
-                return key
+    @property
+    def decision_cache(self):
+        return self.heuristic.decision_cache
 
-        return None
+    @decision_cache.setter
+    def decision_cache(self, decision_cache):
+        self.heuristic.decision_cache = decision_cache
 
-    def defensive_computer_move(self):
-        for row in TTTGame.POSSIBLE_WINNING_ROWS:
-            key = self.winning_square(self.human, row)
-            if key:
-                return key
+    def heuristic_move(self):
+        return self.heuristic.choose(self.board, self.computer.marker,
+                                     self.human.marker)
 
-        return None
+    def offensive_move(self):
+        return self.board.winning_square(self.computer.marker)
+
+    def defensive_computer_move(self):
+        return self.board.winning_square(self.human.marker)
 
     def center_move(self):
-        CENTER = 5 
-        return CENTER if self.board.is_unused_square(CENTER) else None
+        return HeuristicStrategy.center_move(self.board)
 
     def random_move(self):
-        valid_choices = self.board.unused_squares()
-        return random.choice(valid_choices)
+        return random.choice(self.board.unused_squares())
 
     def winning_square(self, player, row):
-        if self.board.count_markers_for(player, row) == 2:
-            for key in row:
-                if self.board.is_unused_square(key):
-                    return key
-
-        return None
+        return self.board.winning_square(player.marker, (row,))
 
     @staticmethod
     def join_or(lst, delimiter=', ', last='or'):
@@ -245,15 +595,16 @@ class TTTGame:
             return f'{delimiter.join(lst[:-1])}{delimiter}{last} {lst[-1]}'
 
     def is_game_over(self):
-        return self.board.is_full() or self.someone_won()
+        return self.board.is_game_over()
 
     def three_in_a_row(self, player, row):
-        return self.board.count_markers_for(player, row) == 3
+        return self.board.count_markers_for(player, row) == self.board.run
 
     def someone_won(self):
         return (self.is_winner(self.human) or
                 self.is_winner(self.computer))
 
 
-game = TTTGame()
-game.play()
+if __name__ == '__main__':
+    game = TTTGame()
+    game.play()
@@ -0,0 +1,237 @@
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import math
+import os
+import time
+
+from selfplay import STRATEGIES, STRATEGY_VERSIONS, SelfPlay, play_batch
+from tablebase import Tablebase
+
+
+class ResultsCache:
+    # Pairing tallies stored as JSON, keyed by both strategies' versions and
+    # the number of games, so a new or changed strategy only replays its own
+    # pairings.
+    PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tournament_cache.json')
+
+    def __init__(self, path=PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.entries = json.load(file)
+
+    @staticmethod
+    def key(first, second, games, seed):
+        return (f"{first}@{STRATEGY_VERSIONS[first]}|"
+                f"{second}@{STRATEGY_VERSIONS[second]}|{games}|{seed}")
+
+    def get(self, first, second, games, seed):
+        entry = self.entries.get(ResultsCache.key(first, second, games, seed))
+        return entry and collections.Counter(entry)
+
+    def put(self, first, second, games, seed, score):
+        self.entries[ResultsCache.key(first, second, games, seed)] = score
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+
+
+class Tournament:
+    def __init__(self, strategies, games, seed=0, workers=None,
+                 cache=None):
+        self.strategies = strategies
+        self.games = games
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+        self.cache = cache
+
+    def pairings(self):
+        return list(itertools.combinations(self.strategies, 2))
+
+    def play(self):
+        # Every pairing's batches share one process pool. Each batch
+        # alternates seats, so both seat orders are played.
+        results = {}
+        missing = []
+        for first, second in self.pairings():
+            cached = self.cache and self.cache.get(first, second, self.games,
+                                                   self.seed)
+            if cached:
+                results[(first, second)] = cached
+            else:
+                missing.append((first, second))
+
+        start = time.perf_counter()
+        if missing:
+            with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+                futures = {}
+                for first, second in missing:
+                    results[(first, second)] = collections.Counter()
+                    self_play = SelfPlay(first, second, self.games, self.seed)
+                    for games, seed in self_play.batches():
+                        future = pool.submit(play_batch, first, second,
+                                             games, seed)
+                        futures[future] = (first, second)
+
+                for future in concurrent.futures.as_completed(futures):
+                    tally, _ = future.result()
+                    results[futures[future]].update(
+                        Tournament.outcomes(tally))
+
+            if self.cache:
+                for pairing in missing:
+                    self.cache.put(*pairing, self.games, self.seed,
+                                   results[pairing])
+                self.cache.save()
+
+        return Ladder(self.strategies, results, missing,
+                      time.perf_counter() - start)
+
+    @staticmethod
+    def outcomes(tally):
+        # Collapses play_batch's per-seat tally to the first strategy's
+        # wins, draws and losses.
+        outcomes = collections.Counter()
+        for (_, outcome), count in tally.items():
+            outcomes[outcome] += count
+
+        return outcomes
+
+
+class Ladder:
+    # Bradley-Terry ratings fitted with the minorization-maximization
+    # updates, with draws as half a win for each side and one virtual draw
+    # per pairing so that a strategy that never scores still gets a finite
+    # rating. Ratings are shown on the Elo scale, centred on 1500.
+    ELO_SCALE = 400 / math.log(10)
+    ELO_CENTER = 1500
+    ITERATIONS = 1000
+    TOLERANCE = 1e-9
+    Z_95 = 1.96
+
+    def __init__(self, strategies, results, played, seconds):
+        self.strategies = strategies
+        self.results = results
+        self.played = played
+        self.seconds = seconds
+        self.ratings = self.fit()
+
+    def games_between(self, first, second):
+        outcomes = self.results.get((first, second)) or self.results.get(
+            (second, first)) or {}
+        return sum(outcomes.values())
+
+    def score(self, first, second):
+        # `first`'s score against `second`, including the virtual draw.
+        if (first, second) in self.results:
+            outcomes = self.results[(first, second)]
+            wins = outcomes['win']
+        else:
+            outcomes = self.results[(second, first)]
+            wins = outcomes['loss']
+
+        return wins + outcomes['draw'] / 2 + 0.5
+
+    def fit(self):
+        strength = {name: 1.0 for name in self.strategies}
+        opponents = {name: [other for other in self.strategies
+                            if other != name]
+                     for name in self.strategies}
+
+        for _ in range(Ladder.ITERATIONS):
+            updated = {}
+            for name in self.strategies:
+                wins = sum(self.score(name, other)
+                           for other in opponents[name])
+                weight = sum((self.games_between(name, other) + 1) /
+                             (strength[name] + strength[other])
+                             for other in opponents[name])
+                updated[name] = wins / weight
+
+            mean_log = (sum(math.log(value) for value in updated.values()) /
+                        len(updated))
+            updated = {name: value / math.exp(mean_log)
+                       for name, value in updated.items()}
+            change = max(abs(updated[name] - strength[name])
+                         for name in strength)
+            strength = updated
+            if change < Ladder.TOLERANCE:
+                break
+
+        return strength
+
+    def elo(self, name):
+        return (Ladder.ELO_CENTER +
+                Ladder.ELO_SCALE * math.log(self.ratings[name]))
+
+    def interval(self, name):
+        # 95% half-width from the Fisher information of this strategy's own
+        # rating, holding the others fixed.
+        information = 0.0
+        for other in self.strategies:
+            if other == name:
+                continue
+            p = self.ratings[name] / (self.ratings[name] +
+                                      self.ratings[other])
+            information += (self.games_between(name, other) + 1) * p * (1 - p)
+
+        return Ladder.Z_95 * Ladder.ELO_SCALE / math.sqrt(information)
+
+    def table(self):
+        lines = [f"{'rank':<6}{'strategy':<12}{'elo':>8}{'95% ci':>10}"]
+        ranked = sorted(self.strategies, key=self.elo, reverse=True)
+        for rank, name in enumerate(ranked, 1):
+            lines.append(f"{rank:<6}{name:<12}{self.elo(name):>8.0f}"
+                         f"{'±' + format(self.interval(name), '.0f'):>10}")
+
+        lines.append("")
+        lines.append(f"{'pairing':<26}{'win':>9}{'draw':>9}{'loss':>9}")
+        for (first, second), outcomes in self.results.items():
+            lines.append(f"{first + ' vs ' + second:<26}"
+                         f"{outcomes['win']:>9}{outcomes['draw']:>9}"
+                         f"{outcomes['loss']:>9}")
+
+        summary = (f"{len(self.played)} of {len(self.results)} pairings "
+                   f"played in {self.seconds:.2f}s")
+        if len(self.played) < len(self.results):
+            summary += ", the rest from cache"
+        lines.append(summary)
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Rank tictactoe strategies in a round-robin tournament.')
+    parser.add_argument('strategies', nargs='*',
+                        help=f"any of {', '.join(STRATEGIES)} (default: all)")
+    parser.add_argument('--games', type=int, default=1_000,
+                        help='games per pairing, split between both seats')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+    has_tablebase = os.path.exists(Tablebase.PATH)
+    strategies = list(dict.fromkeys(args.strategies)) or [
+        name for name in STRATEGIES if name != 'tablebase' or has_tablebase]
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(sorted(unknown))}")
+    if 'tablebase' in strategies and not has_tablebase:
+        parser.error(f"{Tablebase.PATH} is missing; "
+                     "run 'python tablebase.py build' first")
+    if not args.strategies and not has_tablebase:
+        print("Skipping tablebase; run 'python tablebase.py build' to "
+              "include it.")
+    if len(strategies) < 2:
+        parser.error('a tournament needs at least two strategies')
+
+    cache = None if args.no_cache else ResultsCache()
+    tournament = Tournament(strategies, args.games, args.seed, args.workers,
+                            cache)
+    print(tournament.play().table())
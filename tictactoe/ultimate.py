@@ -0,0 +1,256 @@
+import argparse
+import math
+import time
+
+from tictactoe import Board, Square, TTTGame
+
+
+class UltimateBoard:
+    # Nine small boards, each a pair of 3x3 bitboards laid out like Board's.
+    # Moves are (board, square) pairs of Board keys. `won` and `closed` are
+    # meta-board bitboards, with bit `board - 1` set for every small board
+    # a player has won or that can no longer be played in, so checking the
+    # meta-board is the same table lookup as checking a small board.
+    MARKERS = (Square.HUMAN_MARKER, Square.COMPUTER_MARKER)
+    EMPTY_MARKER = "."
+
+    def __init__(self):
+        self.keys = tuple(range(1, 9 * 9 + 1))
+        self.reset()
+
+    def reset(self):
+        self.bits = [[0] * 9, [0] * 9]
+        self.won = [0, 0]
+        self.closed = 0
+        self.next_board = None
+        self.to_move = 0
+        self.winner = None
+        self.history = []
+
+    def player_for(self, marker):
+        return UltimateBoard.MARKERS.index(marker)
+
+    def occupied(self, board):
+        return self.bits[0][board - 1] | self.bits[1][board - 1]
+
+    def marker_at(self, key):
+        board, square = divmod(key - 1, 9)
+        bit = Board.bit_for(square + 1)
+        for player, marker in enumerate(UltimateBoard.MARKERS):
+            if self.bits[player][board] & bit:
+                return marker
+
+        return Square.INITIAL_MARKER
+
+    def open_boards(self):
+        if self.next_board and not self.closed & Board.bit_for(
+                self.next_board):
+            return (self.next_board,)
+
+        return Board.UNUSED_KEYS[self.closed]
+
+    def legal_moves(self):
+        # Only the boards the last move allows are scanned, and each one's
+        # free squares come straight from Board's lookup table.
+        if self.winner is not None:
+            return []
+
+        return [(board, square)
+                for board in self.open_boards()
+                for square in Board.UNUSED_KEYS[self.occupied(board)]]
+
+    def make_move(self, board, square):
+        player = self.to_move
+        meta_bit = Board.bit_for(board)
+        self.history.append((board, square, self.next_board, self.closed,
+                             self.won[player], self.winner))
+
+        bits = self.bits[player][board - 1] | Board.bit_for(square)
+        self.bits[player][board - 1] = bits
+        if Board.WINNING_BITBOARDS[bits]:
+            self.won[player] |= meta_bit
+            self.closed |= meta_bit
+            if Board.WINNING_BITBOARDS[self.won[player]]:
+                self.winner = player
+        elif self.occupied(board) == Board.FULL_MASK:
+            self.closed |= meta_bit
+
+        self.next_board = square
+        self.to_move = 1 - player
+
+    def undo_move(self):
+        (board, square, self.next_board, self.closed,
+         won, self.winner) = self.history.pop()
+        player = 1 - self.to_move
+        self.bits[player][board - 1] &= ~Board.bit_for(square)
+        self.won[player] = won
+        self.to_move = player
+
+    def mark_square_at(self, move, marker):
+        if UltimateBoard.MARKERS[self.to_move] != marker:
+            raise ValueError(f"it is not {marker}'s turn")
+
+        self.make_move(*move)
+
+    def is_winner(self, marker):
+        return self.winner == self.player_for(marker)
+
+    def is_full(self):
+        return self.closed == Board.FULL_MASK
+
+    def is_game_over(self):
+        return self.winner is not None or self.is_full()
+
+    def render(self):
+        lines = [""]
+        for big_row in range(3):
+            if big_row:
+                lines.append("-------+-------+-------")
+            for small_row in range(3):
+                cells = []
+                for big_col in range(3):
+                    board = big_row * 3 + big_col
+                    keys = range(board * 9 + small_row * 3 + 1,
+                                 board * 9 + small_row * 3 + 4)
+                    cells.append(" ".join(self.marker_at(key).replace(
+                        Square.INITIAL_MARKER, UltimateBoard.EMPTY_MARKER)
+                                          for key in keys))
+                lines.append(" " + " | ".join(cells))
+        lines.append("")
+
+        return "\n".join(lines) + "\n"
+
+
+class UltimateSearchPlayer:
+    # Depth-limited negamax with alpha-beta on UltimateBoard's make/undo.
+    # Positions are scored by small boards won, centre board first.
+    WIN_SCORE = 1000
+    BOARD_SCORE = 10
+
+    def __init__(self, depth=5):
+        self.depth = depth
+        self.nodes = 0
+        self.search_seconds = 0.0
+
+    def choose(self, board, marker, opponent_marker):
+        start = time.perf_counter()
+        best_move = None
+        best_score = -math.inf
+
+        for move in board.legal_moves():
+            board.make_move(*move)
+            score = -self.negamax(board, self.depth - 1, -math.inf,
+                                  -best_score)
+            board.undo_move()
+            if score > best_score:
+                best_move, best_score = move, score
+
+        self.search_seconds += time.perf_counter() - start
+        return best_move
+
+    def negamax(self, board, depth, alpha, beta):
+        self.nodes += 1
+        if board.winner is not None:
+            # The player who just moved has won.
+            return -(UltimateSearchPlayer.WIN_SCORE + depth)
+        if board.is_full():
+            return 0
+        if depth == 0:
+            return self.evaluate(board)
+
+        best_score = -math.inf
+        for move in board.legal_moves():
+            board.make_move(*move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha)
+            board.undo_move()
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        return best_score
+
+    def evaluate(self, board):
+        player = board.to_move
+        center = Board.bit_for(5)
+        mine, theirs = board.won[player], board.won[1 - player]
+        return (UltimateSearchPlayer.BOARD_SCORE *
+                (mine.bit_count() - theirs.bit_count()) +
+                bool(mine & center) - bool(theirs & center))
+
+    def nodes_per_second(self):
+        if not self.search_seconds:
+            return 0.0
+
+        return self.nodes / self.search_seconds
+
+    def report(self):
+        return (f"Search: {self.nodes:,} nodes in "
+                f"{self.search_seconds:.2f}s "
+                f"({self.nodes_per_second():,.0f} nodes/s)")
+
+
+class UltimateGame(TTTGame):
+    def __init__(self, strategy=None):
+        super().__init__(strategy or UltimateSearchPlayer())
+        self.board = UltimateBoard()
+
+    def display_welcome_message(self):
+        print("Welcome to Ultimate Tic Tac Toe!")
+        print("Your square picks the board your opponent plays in next.")
+
+    def display_goodbye_message(self):
+        print("Thanks for playing Ultimate Tic Tac Toe! Goodbye!")
+
+    def human_moves(self):
+        while True:
+            move = self.ask_for_move()
+            if move:
+                break
+
+            print("Sorry, that's not a valid choice.")
+            print()
+
+        self.board.mark_square_at(move, self.human.marker)
+
+    def ask_for_move(self):
+        boards = self.board.open_boards()
+        if len(boards) == 1:
+            board = boards[0]
+            print(f"You must play in board {board}.")
+        else:
+            choices_str = TTTGame.join_or([str(board) for board in boards])
+            choice = input(f"Choose a board ({choices_str}): ")
+            board = self.valid_choice(choice, boards)
+            if not board:
+                return None
+
+        squares = Board.UNUSED_KEYS[self.board.occupied(board)]
+        choices_str = TTTGame.join_or([str(square) for square in squares])
+        choice = input(f"Choose a square ({choices_str}): ")
+        square = self.valid_choice(choice, squares)
+        return (board, square) if square else None
+
+    @staticmethod
+    def valid_choice(choice, choices):
+        try:
+            choice = int(choice)
+        except ValueError:
+            return None
+
+        return choice if choice in choices else None
+
+    def computer_moves(self):
+        move = self.strategy.choose(self.board, self.computer.marker,
+                                    self.human.marker)
+        self.board.mark_square_at(move, self.computer.marker)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ultimate Tic Tac Toe.')
+    parser.add_argument('--depth', type=int, default=5)
+    args = parser.parse_args()
+
+    player = UltimateSearchPlayer(args.depth)
+    UltimateGame(player).play()
+    print(player.report())